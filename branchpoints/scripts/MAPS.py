@@ -3,30 +3,27 @@ This script calculates the mutability-adjusted proportion of singletons, MAPS.
 """
 
 # Import the relevant modules
+import sys
 import numpy as np
 import pandas as pd
 import statsmodels.formula.api as smf
 
+sys.path.append("../../near_splice/scripts")
+import mutability
+
 df = pd.read_csv(
     "../outputs/unaff_parents_allele_counts.tsv",
     sep="\t",
     dtype={"csq":"object"}
     )
 
-a = [x[0] for x in df.context]
-b = [x[2] for x in df.context]
-df["alt_context"] = a + df.alt + b
-
-mu_snp = pd.read_csv("../data/forSanger_1KG_mutation_rate_table.txt", sep=" ")
-
-df = df.merge(
-    mu_snp,
-    left_on=["context","alt_context"],
-    right_on=["from","to"]
-    )\
-    .drop(["from","to"], axis=1)
+# Assign mutabilities by mutation class (see mutability.py)
+rates = mutability.load_rates()
+df["mutation"] = mutability.mutation_codes(df.context, df.alt)
+df["mu_snp"] = rates[df.mutation]
+df = df[df.mu_snp.notna()]
 
-df = df[["csq","ac","context","alt_context","mu_snp","region","score"]]
+df = df[["csq","ac","mutation","mu_snp","region","score"]]
 df["set"] = "all"
 df85 = df[df.score >= 0.85].copy()
 df85["set"] = "85"
@@ -35,7 +32,7 @@ df85["set"] = "85"
 # with mutability.
 # Build the model on synonymous variants:
 syn = df[df.csq=="synonymous_variant"]
-syn_g = syn.groupby(["context", "alt_context"])
+syn_g = syn.groupby("mutation")
 
 # Get the relevant summary statistics
 n_singletons = syn_g.ac.apply(lambda x: (x==1).sum()).rename("n_singleton")
@@ -3,9 +3,12 @@ This script annotates all near-splice positions with phyloP scores
 """
 
 # Import the relevant modules
+import sys
 import numpy as np
 import pandas as pd
-import pyBigWig
+
+sys.path.append("../../near_splice/scripts")
+import score_store as ss
 
 def load_data(data):
     """ Read the branchpoint positions into memory
@@ -19,17 +22,12 @@ def load_data(data):
 
     return df
 
-def phylop(row):
-    """ Get the phyloP score for a given position.
-    """
-    return pbw.values(row["chrom"], row["start"]+1, row["end"]-1)[0]
-
 def get_phylop_scores(df):
     """ Get phyloP scores for every position of interest
     """
-    print("Extracting phyloP scores")
+    print("Reading stored phyloP scores")
 
-    df["phylop"] = df.apply(phylop, axis=1)
+    df["phylop"] = ss.load("branch").lookup(df.chrom, df.end - 1).astype(np.float64)
 
     return df
 
@@ -47,8 +45,6 @@ def stats(df, type):
     return stats
 
 if __name__ == "__main__":
-    bw = "/public_data_resources/phylop100way/hg38.phyloP100way.bw"
-    pbw = pyBigWig.open(bw)
     data = "../outputs/branchpoints.bed"
 
     df = load_data(data)\
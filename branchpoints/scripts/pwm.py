@@ -8,20 +8,9 @@ import pandas as pd
 def get_branch():
     """ Get reference alleles at branchpoint positions.
     """
-    df = pd.read_csv("../outputs/branch_contexts.tsv", sep="\t", header=None)
-
-    # create dummy dataframes for simplicity
-    a = df[0].str.split(":", expand=True)
-    b = a[1].str.split("-", expand=True)
-
-    # extract the relevant information
-    chrom = a[0].rename("chrom")
-    start = b[0].astype(int).rename("start")
-    end = b[1].astype(int).rename("end")
-    pos = (b[1].astype(int) - 1).rename("pos")
-    ref = df[1].str.slice(1,2).rename("ref")
-
-    df = (pd.concat([chrom, pos, ref, start, end], axis=1)
+    df = pd.read_csv("../outputs/branch_contexts.tsv", sep="\t", na_filter=False)
+    df = (df.assign(ref=df.context.str.slice(1,2))
+        .drop("context", axis=1)
         .sort_values(by=["chrom","pos"])
         .assign(region="Branchpoint")
     )
@@ -30,8 +19,9 @@ def get_branch():
         sep="\t",
         header=None,
         names=["chrom", "start", "end", "site", "score", "strand"],
-        usecols = ["chrom", "start", "end", "site", "strand"]
+        usecols = ["chrom", "end", "site", "strand"]
         )
+    bp["pos"] = bp.end - 1
     df = (df.merge(bp)
         .query("strand == '+'")
         .loc[:, ["region","site","ref"]]
@@ -7,57 +7,33 @@ near-splice variants.
 import numpy as np
 import pandas as pd
 import os
-
-def load_spliceai_data(path):
-    """ Read a SpliceAI vcf to memory.
+import sys
+sys.path.append("../../near_splice/scripts")
+import position_index as pi
+import spliceai_store as ss
+import spliceai_info as sai
+
+def load_spliceai_data(index):
+    """ Look up the pre-computed SpliceAI scores at every indexed position.
     """
-    df = pd.read_csv(
-        path,
-        comment="#",
-        sep="\t",
-        header=None,
-        names=["chrom","pos","id","ref","alt","qual","filter","info"],
-        usecols=["chrom","pos","ref","alt","info"]
-        )
+    df = ss.load().at_index(pi.load(index))
 
     return df
 
 def tidy_spliceai(df):
-    """ Tidy the SpliceAI vcf, and get the near-splice annotations for each
-    position.
+    """ Calculate the probability of any splicing impact (see spliceai_info.py).
     """
-    # Extract delta score (ds) and delta position (dp)
-    scores = [x.split(";")[0] for x in df.iloc[:,-1].copy()]
-    ds =  pd.DataFrame([x.split("|")[2:6] for x in scores]).astype(float)
-    dp =  pd.DataFrame([x.split("|")[6:] for x in scores]).astype(int)
-
-    # Calculate the probability of any splicing impact
-    ds_any = (1-(1-ds).product(axis=1)).rename("DS_any")
-
-    # Tidy data
-    df = pd.concat([df, ds, dp, ds_any], axis=1)\
-        .drop("info", axis=1)
-
-    df.columns = ["chrom", "pos", "ref", "alt", "DS_AG", "DS_AL", "DS_DG",\
-        "DS_DL", "DP_AG", "DP_AL", "DP_DG", "DP_DL", "DS_any"]
-
-    df["chrom"] = "chr" + df["chrom"].astype(str) # For merging, next.
+    df = sai.summarise(df).drop(["DS_max","DS_max_type"], axis=1)
 
     return df
 
 def merge_near_splice_positions(df):
     """ Retreive branchpoint annotations for each variant
     """
-    branch = pd.read_csv(
-        "../outputs/branchpoints.bed",
-        sep="\t",
-        header=None,
-        names=["chrom","start","end","site","branch_score","strand"]
-        )
-    branch["pos"] = branch.end - 1
-    branch = branch[["chrom","pos","site","branch_score"]]
-
-    df = branch.merge(df)
+    df = (pi.load("branch")
+        .annotate(df, labels=["site", "score"])
+        .rename(columns={"score":"branch_score"})
+    )
 
     return df
 
@@ -79,7 +55,6 @@ def spliceai_stats(df, type):
     return stats
 
 if __name__ == "__main__":
-    in_path = "../outputs/branch_spliceai_scores.vcf"
     output = "../outputs/branch_spliceai_scores.tsv"
     stats_out = "../stats/branch_spliceai.tsv"
 
@@ -87,7 +62,7 @@ if __name__ == "__main__":
         df = pd.read_csv(output, sep="\t")
 
     else:
-        df = load_spliceai_data(in_path)\
+        df = load_spliceai_data("branch")\
             .pipe(tidy_spliceai)\
             .pipe(merge_near_splice_positions)
 
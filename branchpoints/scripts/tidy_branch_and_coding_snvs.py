@@ -9,39 +9,31 @@ branchpoint annotation.
 import numpy as np
 import pandas as pd
 import os
-
-def get_allele_counts(path):
-    """ Read the allele counts for SNVs in the unaffected parents.
+import sys
+sys.path.append("../../near_splice/scripts")
+import position_index as pi
+import allele_counts as ac
+
+def get_allele_counts(prefix):
+    """ Read the allele counts for SNVs in the unaffected parents, in the
+    compact or verbose format (see allele_counts.py).
     """
 
-    names = ["chrom", "pos", "ref", "alt", "filter", "an", "ac", "sample"]
-
-    df = pd.read_csv(
-        path,
-        sep="\t",
-        header=None,
-        names=names,
-        usecols=["chrom", "pos", "ref", "alt", "ac"]
-        )\
+    df = ac.read(prefix)\
         .drop_duplicates(subset=["chrom", "pos", "ref", "alt"], keep=False)
 
     return df
 
-def get_branch_csqs(path):
+def get_branch_csqs(df):
     """ Get the branchpoint annotations for each branchpoint variant.
+    Variants outside the branchpoint positions are dropped.
     """
 
-    df = pd.read_csv(
-        path,
-        sep="\t",
-        header=None,
-        names=["chrom","start","end","csq","score","strand"],
-        usecols=["chrom","end","csq","score"],
-        )
-
+    df = (pi.load("branch")
+        .annotate(df, labels=["site", "score"])
+        .rename(columns={"site":"csq"})
+    )
     df["region"] = "Branchpoint"
-    df["pos"] = df.end - 1
-    df = df.drop("end", axis=1)
 
     return df
 
@@ -52,18 +44,8 @@ def get_branch_contexts(path):
     df = pd.read_csv(
         path,
         sep="\t",
-        header=None,
-        names=["span","context"]
-        )
-
-    # List comprehensions are faster than string methods here:
-    a = pd.DataFrame([x.split(":") for x in df.span])
-    b = pd.DataFrame([x.split("-") for x in a[1]]).astype(int)
-
-    chrom = a[0].rename("chrom")
-    pos = (b[0] + 2).rename("pos")
-
-    df = pd.concat([chrom, pos, df.context], axis=1)\
+        na_filter=False # e.g. "NaN" is a valid context
+        )\
         .drop_duplicates()\
         .drop_duplicates(subset=["chrom","pos"], keep=False)
 
@@ -84,13 +66,12 @@ def combine_annotations():
     """ Run the functions above to retrieve the annotations.
     Merge these annotations together.
     """
-    branch_snvs = get_allele_counts("../outputs/unaff_parents_branch_snvs.tsv")
-    branch_csqs = get_branch_csqs("../outputs/branchpoints.bed")
+    branch_snvs = get_allele_counts("../outputs/unaff_parents_branch_snvs")
     branch_ctxt = get_branch_contexts("../outputs/branch_contexts.tsv")
 
     # Merge the data, to retrieve consequences and context annotations for each
     # allele
-    branch = branch_snvs.merge(branch_csqs).merge(branch_ctxt)
+    branch = get_branch_csqs(branch_snvs).merge(branch_ctxt)
 
     # Concatenate the coding and near-splice variants
     coding = get_coding_csqs("/re_gecip/machine_learning/AlexBlakes/near_splice/write_up/paper/code/near_splice/outputs/unaff_parents_allele_counts.tsv")
@@ -5,6 +5,9 @@ This script finds DNMs which fall within known dominant LoF disease genes.
 # Import relevant modules
 import numpy as np
 import pandas as pd
+import sys
+sys.path.append("../../near_splice/scripts")
+import gene_index as gi
 
 # Load variant data to memory
 def get_dnms():
@@ -19,27 +22,16 @@ def get_dnms():
 
     return dnms
 
-def get_vep_output():
-    """Get the VEP output."""
-    vep = pd.read_csv(
-        "../outputs/near_splice_and_branch_dnms_vep.tsv",
-        comment="#",
-        sep="\t",
-        header=None,
-        names=["variant","ensg","enst","hgnc_id","csq"],
-        na_values="-",
+def get_genes(dnms):
+    """Get the genes within 5kb of each DNM (as VEP reports upstream and
+    downstream genes), with their HGNC IDs.
+    """
+    genes = gi.load().annotate(
+        dnms[["chrom","pos","ref","alt"]].drop_duplicates(),
+        flank=5000
         )
 
-    variant = vep.variant.str.split("_", expand=True)
-    vep["chrom"] = variant[0]
-    vep["pos"] = variant[1].astype(int)
-    vep["ref"] = variant[2].str.slice(0,1)
-    vep["alt"] = variant[2].str.slice(2)
-    vep["hgnc_id"] = vep["hgnc_id"].str.slice(5).astype(float)
-
-    vep = vep[["chrom","pos","ref","alt","ensg","enst","hgnc_id"]]
-
-    return vep
+    return genes[["chrom","pos","ref","alt","ensg","enst","hgnc_id"]]
 
 def read_g2p(path):
     """Get G2P data.
@@ -77,10 +69,10 @@ def get_g2p():
 # Merge the data to find DNMs within known RD genes
 if __name__ == "__main__":
     dnms = get_dnms()
-    vep = get_vep_output()
+    genes = get_genes(dnms)
     g2p = get_g2p()
 
-    df = dnms.merge(vep)\
+    df = dnms.merge(genes)\
         .merge(g2p)
 
     df.to_csv("../outputs/dnms_in_g2p_genes.tsv", sep="\t", index=False)
@@ -3,6 +3,11 @@ and branchpoint positions of interest. """
 
 import numpy as np
 import pandas as pd
+import sys
+sys.path.append("../../near_splice/scripts")
+import position_index as pi
+
+code_dir = "/re_gecip/machine_learning/AlexBlakes/near_splice/write_up/paper/code/"
 
 def get_dnms():
     """ Read the "stringent" GEL DNMs into memory.
@@ -52,27 +57,21 @@ def get_dnm_cohort():
     )
     return chrt
 
-def get_near_splice_positions():
-    """ Get the near-splice positions
+def get_near_splice_dnms(dnms):
+    """ Get the DNMs at near-splice positions
     """
-    ns = pd.read_csv(
-    "/re_gecip/machine_learning/AlexBlakes/near_splice/write_up/paper/code/near_splice/outputs/near_splice_positions.tsv",
-    sep="\t",
+    ns = (pi.load("near_splice", outputs=code_dir + "near_splice/outputs")
+        .annotate(dnms, labels=["strand", "region", "site"])
     )
     return ns
 
-def get_branch_positions():
-    """ Get the branchpoint positions
+def get_branch_dnms(dnms):
+    """ Get the DNMs at branchpoint positions
     """
-    branch = pd.read_csv(
-        "/re_gecip/machine_learning/AlexBlakes/near_splice/write_up/paper/code/branchpoints/outputs/branchpoints.bed",
-        sep="\t",
-        header=None,
-        names=["chrom","start","end","site","score","strand"]
-        )
-    branch["pos"] = branch.end - 1
+    branch = (pi.load("branch", outputs=code_dir + "branchpoints/outputs")
+        .annotate(dnms, labels=["strand", "site"])
+    )
     branch["region"] = "branch"
-    branch = branch[["chrom","pos","strand","region","site"]]
 
     return branch
 
@@ -86,8 +85,6 @@ def to_vcf(df):
         .drop_duplicates(["chrom","pos","ref","alt"])
         .sort_values(by=["chrom","pos"])
     )
-    df_no_chr = df.copy()
-    df_no_chr["chrom"] = df_no_chr.chrom.str.slice(3) # Remove "chr" prefix
 
     header = open("../data/vcf_38_header.txt").read()
 
@@ -95,15 +92,11 @@ def to_vcf(df):
         output.write(header)
         df.to_csv(output, index=False, sep="\t", header=False)
 
-    with open("../outputs/near_splice_and_branch_dnms_no_chr_prefix.vcf", "w") as output:
-        output.write(header)
-        df_no_chr.to_csv(output, index=False, sep="\t", header=False)
-
 if __name__ == "__main__":
     # Find DNMs overlapping branchpoint / near-splice positions.
     dnms = get_dnms().merge(get_dnm_cohort())
-    branch = get_branch_positions().merge(dnms)
-    ns = get_near_splice_positions().merge(dnms)
+    branch = get_branch_dnms(dnms)
+    ns = get_near_splice_dnms(dnms)
 
     df = (pd.concat([ns, branch])
         .drop_duplicates(["chrom","pos","participant_id"])
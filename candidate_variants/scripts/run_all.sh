@@ -4,9 +4,6 @@
 ### directory
 
 python3 extract_dnms.py
-bsub < vep_snvs.sh
-bash extract_spliceai_scores.sh
-bwait -w 'ended(extract_spliceai_scores)'
 python3 spliceai_stats.py
-python3 dnms_in_g2p_genes.py
+python3 dnms_in_g2p_genes.py # Finds overlapping genes with gene_index.py, not VEP
 python3 participant_data.py
@@ -1,36 +1,38 @@
 """
 This script calculates the mutability-adjusted proportion of singletons, MAPS.
+
+The collated SNVs are read for the coding consequences of VEP by default, or
+of coding_consequences.py with:
+    python3 MAPS.py gencode
+in which case the output is named maps_output_gencode.tsv.
 """
 
 # Import the relevant modules
+import sys
 import numpy as np
 import pandas as pd
 import statsmodels.formula.api as smf
 import statsmodels.api as sm
+import mutability
+import tidy_near_splice_and_coding_snvs as tidy
 
-df = pd.read_csv("../outputs/unaff_parents_allele_counts.tsv", sep="\t")
-
-a = [x[0] for x in df.context]
-b = [x[2] for x in df.context]
-df["alt_context"] = a + df.alt + b
-
-mu_snp = pd.read_csv("../data/forSanger_1KG_mutation_rate_table.txt", sep=" ")
+csq_source = sys.argv[1] if len(sys.argv) > 1 else "vep"
+df = pd.read_csv(tidy.output_path(csq_source), sep="\t")
 
-df = df.merge(
-    mu_snp,
-    left_on=["context","alt_context"],
-    right_on=["from","to"]
-    )\
-    .drop(["from","to"], axis=1)
+# Assign mutabilities by mutation class (see mutability.py)
+rates = mutability.load_rates()
+df["mutation"] = mutability.mutation_codes(df.context, df.alt)
+df["mu_snp"] = rates[df.mutation]
+df = df[df.mu_snp.notna()]
 
-df = df[["csq","ac","context","alt_context","mu_snp"]]
+df = df[["csq","ac","mutation","mu_snp"]]
 df_g = df.groupby("csq")
 
 # Construct a linear model describing how the proportion of singletons varies
 # with mutability.
 # Build the model on synonymous variants:
 syn = df_g.get_group("synonymous_variant")
-syn_g = syn.groupby(["context", "alt_context"])
+syn_g = syn.groupby("mutation")
 
 # Get the relevant summary statistics
 n_singletons = syn_g.ac.apply(lambda x: (x==1).sum()).rename("n_singleton")
@@ -74,4 +76,5 @@ labels["xlab"] = labels.xlab.str.replace("Stop", "Nonsense")
 maps_out = pd.concat([labels.loc[:, "region":], n_singletons, n_alleles, ps_raw,
     se, mu, ps_pred, maps, ci_upper, ci_lower], axis=1).reset_index(drop=True)
 
-maps_out.to_csv("../stats/maps_output.tsv", sep="\t", index=False)
+suffix = "" if csq_source == "vep" else f"_{csq_source}"
+maps_out.to_csv(f"../stats/maps_output{suffix}.tsv", sep="\t", index=False)
@@ -0,0 +1,93 @@
+"""
+This script reads and writes the allele counts of SNVs in the unaffected
+parents (extract_parent_snvs.sh output), in either of two formats.
+
+- compact (default): fixed-width binary records, one per SNV, with only the
+  fields used downstream (see dtype). Records have no header, so per-chunk
+  files are concatenated with cat. Files end in ".bin".
+- verbose: bcftools query text, with the genotype, depth, genotype quality and
+  allelic depths of every carrier. Files end in ".tsv".
+
+As a script, this converts the compact bcftools query output (stdin):
+    CHROM  POS  REF  ALT  AN  AC  AC_Het  AC_Hom
+into compact binary records (stdout), e.g.
+    bcftools query -f ... | python3 allele_counts.py > chunk.bin
+"""
+
+# Import the relevant modules
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+dtype = np.dtype([
+    ("chrom", "S5"),
+    ("pos", "<u4"),
+    ("ref", "S1"),
+    ("alt", "S1"),
+    ("an", "<u4"),
+    ("ac", "<u4"),
+    ("carriers", "<u4"), # Heterozygous plus homozygous alternate samples
+    ])
+
+query_fields = ["chrom", "pos", "ref", "alt", "an", "ac", "ac_het", "ac_hom"]
+verbose_fields = ["chrom", "pos", "ref", "alt", "filter", "an", "ac", "sample"]
+
+def to_records(df):
+    """ Convert compact bcftools query output to fixed-width records.
+    """
+    records = np.zeros(len(df), dtype=dtype)
+
+    for field in ["chrom", "pos", "ref", "alt", "an", "ac"]:
+        records[field] = df[field].to_numpy()
+    records["carriers"] = df.ac_het.to_numpy() + df.ac_hom.to_numpy() // 2
+
+    return records
+
+def convert(source=sys.stdin, dest=sys.stdout.buffer, chunksize=1000000):
+    """ Convert compact bcftools query output to fixed-width records, in chunks.
+    Empty input (no SNVs in a chunk) gives empty output.
+    """
+    try:
+        chunks = pd.read_csv(
+            source,
+            sep="\t",
+            header=None,
+            names=query_fields,
+            dtype={"chrom":str, "ref":str, "alt":str},
+            chunksize=chunksize
+            )
+    except pd.errors.EmptyDataError:
+        return
+
+    for df in chunks:
+        dest.write(to_records(df).tobytes())
+
+def read(prefix):
+    """ Read the allele counts of SNVs (chrom, pos, ref, alt, ac), from the
+    compact (prefix.bin) or verbose (prefix.tsv) format.
+    """
+    if os.path.exists(prefix + ".bin"):
+        records = np.fromfile(prefix + ".bin", dtype=dtype)
+
+        df = pd.DataFrame({
+            "chrom": records["chrom"].astype(str),
+            "pos": records["pos"].astype(np.int64),
+            "ref": records["ref"].astype(str),
+            "alt": records["alt"].astype(str),
+            "ac": records["ac"].astype(np.int64),
+            })
+
+    else:
+        df = pd.read_csv(
+            prefix + ".tsv",
+            sep="\t",
+            header=None,
+            names=verbose_fields,
+            usecols=["chrom", "pos", "ref", "alt", "ac"]
+            )
+
+    return df
+
+if __name__ == "__main__":
+    convert()
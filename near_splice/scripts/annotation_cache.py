@@ -0,0 +1,121 @@
+"""
+This script caches parsed annotation dataframes (e.g. the filtered GENCODE
+exons) in a typed columnar format, so that later runs can skip re-parsing the
+source text files.
+
+Each cached dataframe is stored as an uncompressed .npz archive with one array
+per column:
+- numeric columns are stored as they are
+- categorical columns are stored as integer codes plus their categories
+- string columns are stored as concatenated UTF-8 bytes plus offsets
+
+Cache files are keyed by the checksum of the source file and the settings used
+to parse / filter it. If either changes, the cache is rebuilt.
+"""
+
+# Import the relevant modules
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+cache_dir = "../outputs/cache"
+
+def checksum(path, blocksize=2**20):
+    """ Get the MD5 checksum of a file.
+    """
+    md5 = hashlib.md5()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+def cache_key(source, settings):
+    """ Combine the checksum of the source file with the parsing / filtering
+    settings into a single key.
+    """
+    settings = json.dumps(settings, sort_keys=True, default=str)
+    key = hashlib.md5((checksum(source) + settings).encode()).hexdigest()
+
+    return key
+
+def encode_strings(values):
+    """ Encode an array of strings as concatenated UTF-8 bytes and offsets.
+    """
+    encoded = [x.encode() for x in values]
+    lengths = np.fromiter((len(x) for x in encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    return data, offsets
+
+def decode_strings(data, offsets):
+    """ Decode concatenated UTF-8 bytes and offsets back to an array of strings.
+    """
+    buffer = data.tobytes()
+    values = [buffer[a:b].decode() for a, b in zip(offsets[:-1], offsets[1:])]
+
+    return np.array(values, dtype=object)
+
+def save_frame(df, path):
+    """ Write a dataframe to a columnar .npz archive.
+    """
+    arrays = {"columns": np.array(df.columns, dtype=str)}
+
+    for i, col in enumerate(df.columns):
+        x = df[col]
+
+        if isinstance(x.dtype, pd.CategoricalDtype):
+            cats = x.cat.categories.astype(str)
+            arrays[f"{i}_codes"] = x.cat.codes.to_numpy()
+            arrays[f"{i}_cat_data"], arrays[f"{i}_cat_offsets"] = encode_strings(cats)
+        elif x.dtype.kind in "biuf":
+            arrays[f"{i}_values"] = x.to_numpy()
+        else:
+            arrays[f"{i}_data"], arrays[f"{i}_offsets"] = encode_strings(x.astype(str))
+
+    # Write to a temporary file first, so an interrupted run leaves no cache
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+def load_frame(path):
+    """ Read a dataframe from a columnar .npz archive.
+    """
+    with np.load(path) as arrays:
+        data = {}
+
+        for i, col in enumerate(arrays["columns"].tolist()):
+            if f"{i}_codes" in arrays:
+                cats = decode_strings(arrays[f"{i}_cat_data"], arrays[f"{i}_cat_offsets"])
+                data[col] = pd.Categorical.from_codes(arrays[f"{i}_codes"], cats)
+            elif f"{i}_data" in arrays:
+                data[col] = decode_strings(arrays[f"{i}_data"], arrays[f"{i}_offsets"])
+            else:
+                data[col] = arrays[f"{i}_values"]
+
+    df = pd.DataFrame(data)
+
+    return df
+
+def cached(build, source, settings, name):
+    """ Return the cached dataframe for this source file and settings, if it
+    exists. Otherwise, build the dataframe with build() and cache it.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = cache_key(source, settings)
+    path = os.path.join(cache_dir, f"{name}_{key}.npz")
+
+    if os.path.exists(path):
+        print(f"Loading cached {name} from {path}")
+        return load_frame(path)
+
+    df = build()
+    save_frame(df, path)
+
+    return df
@@ -0,0 +1,223 @@
+"""
+This script writes block-gzipped (BGZF) files, and tabix (.tbi) indexes for
+BGZF-compressed VCFs, without calling bgzip or tabix.
+
+Blocks are compressed on a thread pool (zlib releases the GIL), and the tabix
+index is built from the records as they are written, so a VCF never has to be
+written uncompressed or re-read to be indexed.
+
+BGZF format: https://samtools.github.io/hts-specs/SAMv1.pdf (section 4.1)
+Tabix format: https://samtools.github.io/hts-specs/tabix.pdf
+"""
+
+# Import the relevant modules
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+block_size = 65280 # Uncompressed bytes per block, as used by bgzip
+eof = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+def compress_block(data, level=6):
+    """ Compress one BGZF block.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+
+    header = struct.pack("<4BI2BH2BHH", 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2,
+        len(cdata) + 25)
+    footer = struct.pack("<2I", zlib.crc32(data), len(data))
+
+    return header + cdata + footer
+
+class BgzfWriter:
+    """ Write a BGZF file, compressing blocks on a thread pool.
+    The uncompressed stream is cut into blocks of exactly block_size bytes, so
+    the block holding any uncompressed offset is known before compression.
+    """
+    def __init__(self, path, threads=4, level=6, batch=64):
+        self.file = open(path, "wb")
+        self.pool = ThreadPoolExecutor(threads)
+        self.level = level
+        self.batch = batch * threads
+        self.buffer = bytearray()
+        self.offset = 0 # Uncompressed bytes written so far
+        self.block_offsets = [0] # Compressed offset of each block
+
+    def write(self, data):
+        """ Write (uncompressed) text or bytes.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+
+        self.buffer += data
+        self.offset += len(data)
+
+        if len(self.buffer) >= self.batch * block_size:
+            self.flush(final=False)
+
+    def flush(self, final=True):
+        """ Compress and write all complete blocks in the buffer (and the last,
+        partial block if final).
+        """
+        n = len(self.buffer) if final else len(self.buffer) // block_size * block_size
+        blocks = [bytes(self.buffer[i:i + block_size]) for i in range(0, n, block_size)]
+        del self.buffer[:n]
+
+        for block in self.pool.map(lambda x: compress_block(x, self.level), blocks):
+            self.file.write(block)
+            self.block_offsets.append(self.block_offsets[-1] + len(block))
+
+    def virtual_offset(self, offset):
+        """ Convert uncompressed offsets (as returned by tell) into BGZF virtual
+        file offsets. Only valid once the blocks holding them are written.
+        """
+        offset = np.asarray(offset, dtype=np.int64)
+        block = offset // block_size
+        cblock = np.asarray(self.block_offsets, dtype=np.int64)[block]
+
+        return (cblock << 16) | (offset - block * block_size)
+
+    def tell(self):
+        """ Get the current uncompressed offset.
+        """
+        return self.offset
+
+    def close(self):
+        """ Flush the remaining data and write the BGZF EOF marker.
+        """
+        self.flush()
+        self.file.write(eof)
+        self.file.close()
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def reg2bin(beg, end):
+    """ Get the tabix / BAI bin for each 0-based, half-open region.
+    """
+    end = end - 1
+    bins = np.zeros(len(beg), dtype=np.int64)
+    unassigned = np.ones(len(beg), dtype=bool)
+
+    for shift, first_bin in [(14, 4681), (17, 585), (20, 73), (23, 9), (26, 1)]:
+        same = unassigned & ((beg >> shift) == (end >> shift))
+        bins[same] = first_bin + (beg[same] >> shift)
+        unassigned &= ~same
+
+    return bins
+
+class VcfWriter(BgzfWriter):
+    """ Write a BGZF-compressed VCF, and its tabix index.
+    Records must be sorted by position within each chromosome, and each
+    chromosome must be written in one contiguous run.
+    """
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.path = path
+        self.chroms = [] # In order of appearance
+        self.runs = [] # (chrom, bin, first offset, end offset) per run of records
+        self.windows = [] # (chrom, window, first offset) per run of records
+        self.n_records = {}
+
+    def write_frame(self, df):
+        """ Write a dataframe of VCF records (CHROM, POS, ID, REF, ALT, ...).
+        """
+        if len(df) == 0:
+            return
+
+        text = df.to_csv(sep="\t", index=False, header=False).encode()
+
+        # Uncompressed offset of the start and end of every record
+        newlines = np.flatnonzero(np.frombuffer(text, dtype=np.uint8) == 10)
+        ends = self.tell() + newlines + 1
+        starts = np.concatenate([[self.tell()], ends[:-1]])
+
+        chrom = df.iloc[:,0].astype(str).to_numpy()
+        beg = df.iloc[:,1].to_numpy(np.int64) - 1
+        end = beg + df.iloc[:,3].str.len().to_numpy(np.int64)
+
+        self.index_records(chrom, beg, end, starts, ends)
+        self.write(text)
+
+    def index_records(self, chrom, beg, end, starts, ends):
+        """ Collapse records into runs with the same bin and linear index window.
+        """
+        bins = reg2bin(beg, end)
+        window = beg >> 14
+
+        new_run = np.ones(len(chrom), dtype=bool)
+        new_run[1:] = (chrom[1:] != chrom[:-1]) | (bins[1:] != bins[:-1]) | (window[1:] != window[:-1])
+        first = np.flatnonzero(new_run)
+        last = np.append(first[1:], len(chrom)) - 1
+
+        for c in chrom[first]:
+            if c not in self.n_records:
+                self.chroms.append(c)
+                self.n_records[c] = 0
+
+        for i, j in zip(first, last):
+            self.runs.append((chrom[i], bins[i], starts[i], ends[j]))
+            self.windows.append((chrom[i], window[i], starts[i]))
+            self.n_records[chrom[i]] += j - i + 1
+
+    def close(self):
+        """ Finish the VCF, then write its tabix index.
+        """
+        super().close()
+        self.write_index(self.path + ".tbi")
+
+    def write_index(self, path):
+        """ Write the tabix index.
+        """
+        names = b"".join(c.encode() + b"\0" for c in self.chroms)
+        index = [b"TBI\1", struct.pack("<8i", len(self.chroms), 2, 1, 2, 0,
+            ord("#"), 0, len(names)), names]
+
+        runs_by_chrom, windows_by_chrom = {}, {}
+        for run in self.runs:
+            runs_by_chrom.setdefault(run[0], []).append(run)
+        for window in self.windows:
+            windows_by_chrom.setdefault(window[0], []).append(window)
+
+        for chrom in self.chroms:
+            runs = runs_by_chrom[chrom]
+            voffsets = self.virtual_offset([[r[2], r[3]] for r in runs])
+
+            # Chunks in each bin (adjacent chunks are merged)
+            bins = {}
+            for (_, b, _, _), (vbeg, vend) in zip(runs, voffsets):
+                chunks = bins.setdefault(b, [])
+                if chunks and chunks[-1][1] == vbeg:
+                    chunks[-1][1] = vend
+                else:
+                    chunks.append([vbeg, vend])
+
+            # Pseudo-bin with the span of the chromosome and the record count
+            bins[37450] = [[voffsets[0][0], voffsets[-1][1]], [self.n_records[chrom], 0]]
+
+            index.append(struct.pack("<i", len(bins)))
+            for b, chunks in bins.items():
+                index.append(struct.pack("<Ii", b, len(chunks)))
+                index.append(np.asarray(chunks, dtype="<u8").tobytes())
+
+            # Linear index: the first record overlapping each 16kb window
+            windows = windows_by_chrom[chrom]
+            linear = np.zeros(max(w[1] for w in windows) + 1, dtype=np.int64)
+            for (_, w, _), v in zip(windows, self.virtual_offset([w[2] for w in windows])):
+                if linear[w] == 0:
+                    linear[w] = v
+            linear = np.maximum.accumulate(linear) # Fill empty windows
+
+            index.append(struct.pack("<i", len(linear)))
+            index.append(linear.astype("<u8").tobytes())
+
+        index.append(struct.pack("<Q", 0)) # No unplaced records
+
+        with BgzfWriter(path, threads=1) as f:
+            f.write(b"".join(index))
@@ -0,0 +1,86 @@
+"""
+This script extracts per-base scores (e.g. phyloP) from a bigWig file for many
+positions at once.
+
+Positions are sorted and grouped into runs of nearby positions (e.g. a splice
+window or a coding exon), and each run is read with a single bigWig query,
+rather than one query per position. Chromosomes are spread across a process
+pool, with one bigWig handle per worker.
+"""
+
+# Import the relevant modules
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+import pyBigWig
+
+phylop = "/public_data_resources/phylop100way/hg38.phyloP100way.bw"
+
+def chrom_scores(pbw, chrom, pos, max_gap=100):
+    """ Get the scores of 1-based positions on one chromosome.
+    Positions closer together than max_gap are read with a single query.
+    Positions without a score (or on chromosomes not in the bigWig) are NaN.
+    """
+    pos = np.asarray(pos, dtype=np.int64) - 1
+    order = np.argsort(pos, kind="mergesort")
+    pos = pos[order]
+
+    out = np.full(len(pos), np.nan, dtype=np.float32)
+
+    if chrom not in pbw.chroms():
+        return out
+
+    breaks = np.flatnonzero(np.diff(pos) > max_gap) + 1
+    for run in np.split(np.arange(len(pos)), breaks):
+        if len(run) == 0:
+            continue
+
+        start, end = pos[run[0]], pos[run[-1]] + 1
+        values = np.asarray(
+            pbw.values(chrom, int(start), int(end), numpy=pyBigWig.numpy),
+            dtype=np.float32
+            )
+        out[run] = values[pos[run] - start]
+
+    # Restore the input order
+    scores = np.empty_like(out)
+    scores[order] = out
+
+    return scores
+
+def init_worker(path):
+    """ Open the bigWig once in each worker process.
+    """
+    global pbw
+    pbw = pyBigWig.open(path)
+
+def worker(args):
+    """ Get the scores for one chromosome, in a worker process.
+    """
+    chrom, pos, max_gap = args
+    return chrom_scores(pbw, chrom, pos, max_gap)
+
+def iter_chrom_scores(positions, path=phylop, processes=8, max_gap=100):
+    """ Get the scores of the positions on each chromosome ({chrom: pos}),
+    yielding (chrom, scores) pairs in the order of the input.
+    """
+    jobs = [(chrom, pos, max_gap) for chrom, pos in positions.items()]
+
+    with Pool(min(processes, max(len(jobs), 1)), init_worker, (path,)) as pool:
+        for (chrom, _, _), scores in zip(jobs, pool.imap(worker, jobs)):
+            yield chrom, scores
+
+def get_scores(chrom, pos, path=phylop, processes=8, max_gap=100):
+    """ Get the score of every (chrom, pos) pair, as a float32 array in the
+    input order. Positions are 1-based.
+    """
+    pos = np.asarray(pos)
+    indices = pd.Series(np.asarray(chrom)).groupby(np.asarray(chrom)).indices
+
+    positions = {c: pos[i] for c, i in indices.items()}
+    scores = np.full(len(pos), np.nan, dtype=np.float32)
+
+    for c, x in iter_chrom_scores(positions, path, processes, max_gap):
+        scores[indices[c]] = x
+
+    return scores
@@ -0,0 +1,245 @@
+"""
+This script annotates every possible coding SNV with its consequence
+(synonymous, missense, stop gained, etc.), from the filtered GENCODE CDS exons
+(exon_filter.py) and the reference sequence, without VEP.
+
+For each transcript, the CDS exons are put in transcript order (by strand),
+and every CDS position is given its codon and position within the codon, from
+its offset in the CDS and the phase of the first CDS exon. Bases are read from
+the reference (and complemented for - strand transcripts), and all three
+alternate alleles at every position are translated at once, with the codons
+encoded as integers from 0 to 63 (2 bits per base, see mutability.py). Only
+complete codons are annotated.
+
+A change to the first codon is start_lost only in transcripts whose CDS
+starts with a complete codon (phase 0) and is not tagged cds_start_NF: in
+5'-incomplete transcripts, the first annotated codon is not the start codon.
+
+Where an SNV is in more than one transcript, it gets the most severe of its
+consequences (in the order of the consequences list, below). NB VEP --pick
+(vep_snvs.sh) chooses one transcript per SNV instead, so the two can differ
+where transcripts overlap in different frames.
+
+Consequences are saved per chromosome as sorted SNV keys (see vep_cache.py)
+and consequence codes, in ../outputs/coding_consequences.
+
+Usage (from near_splice/scripts):
+    python3 coding_consequences.py
+"""
+
+# Import the relevant modules
+import os
+import numpy as np
+import pandas as pd
+import annotation_cache
+import gtf_attributes as ga
+import mutability
+import near_splice_sites as nss
+import reference
+import vep_cache as vc
+
+output_dir = "../outputs/coding_consequences"
+
+# In order of severity, as ranked by VEP
+consequences = [
+    "stop_gained",
+    "stop_lost",
+    "start_lost",
+    "missense_variant",
+    "stop_retained_variant",
+    "synonymous_variant",
+    ]
+csq_codes = {csq: np.uint8(i) for i, csq in enumerate(consequences)}
+
+# The standard genetic code, with codons in TCAG order, re-ordered to ACGT
+tcag = "TCAG"
+amino_acids = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+table = {a + b + c: amino_acids[16*i + 4*j + k]
+    for i, a in enumerate(tcag) for j, b in enumerate(tcag) for k, c in enumerate(tcag)}
+genetic_code = np.array([table[a + b + c] for a in "ACGT" for b in "ACGT" for c in "ACGT"])
+
+def load_cds(data="../outputs/coding_exons.tsv"):
+    """ Read the filtered CDS exons, with the transcript of each, and whether
+    its start is incomplete (the cds_start_NF tag).
+    """
+    usecols = ["chrom", "start", "end", "strand", "phase", "attr"]
+
+    read = lambda: pd.read_csv(
+        data,
+        sep="\t",
+        usecols=usecols,
+        dtype = {"chrom":"category", "strand":"category"}
+        )
+
+    df = annotation_cache.cached(
+        read,
+        source=data,
+        settings={"usecols":usecols},
+        name="load_cds"
+        )
+
+    attr = ga.parse_attributes(df.attr, ["transcript_id", "tags"])
+    df["enst"] = attr.transcript_id
+    df["start_nf"] = (attr.tags & ga.tag_mask("cds_start_NF")) != 0
+    df = df.drop("attr", axis=1)\
+        .pipe(nss.autosomes_only)\
+        .drop_duplicates(["enst", "start", "end"])
+
+    return df
+
+def cds_positions(df):
+    """ Get every CDS position of each transcript on one chromosome, in
+    transcript order. Returns a dataframe with the transcript (as a code), the
+    position, whether the transcript is on the - strand, the codon and
+    position within the codon (frame) of each position, and whether the
+    transcript's first codon is its start codon (a phase 0 first CDS exon,
+    and not cds_start_NF). Positions before the first complete codon have a
+    negative codon.
+    """
+    # Transcript order: ascending starts on +, descending on -
+    df = df.assign(order=np.where(df.strand == "-", -df.start, df.start))\
+        .sort_values(["enst", "order"])
+
+    minus = (df.strand == "-").to_numpy()
+    start = df.start.to_numpy(np.int64)
+    end = df.end.to_numpy(np.int64)
+    length = end - start + 1
+    tx = pd.factorize(df.enst.astype(str))[0]
+
+    # Offset of each exon in its transcript's CDS, less the phase of the
+    # transcript's first CDS exon
+    phase = pd.to_numeric(df.phase, errors="coerce").fillna(0).astype(np.int64)
+    first_phase = phase.groupby(tx).transform("first").to_numpy()
+    grouped = pd.Series(length, index=df.index).groupby(tx)
+    exon_offset = (grouped.cumsum() - length).to_numpy() - first_phase
+
+    start_nf = df.start_nf.groupby(tx).transform("any").to_numpy()
+    complete_start = (first_phase == 0) & ~start_nf
+
+    # One row per position, counting down from the end of - strand exons
+    exon = np.repeat(np.arange(len(df)), length)
+    within = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+    pos = np.where(minus[exon], end[exon] - within, start[exon] + within)
+    offset = exon_offset[exon] + within
+
+    return pd.DataFrame({
+        "tx": tx[exon],
+        "pos": pos,
+        "minus": minus[exon],
+        "codon": offset // 3,
+        "frame": offset % 3,
+        "complete_start": complete_start[exon],
+        })
+
+def classify(ref_aa, alt_aa, start_codon):
+    """ Get the consequence code of each codon change. Met changes are
+    start_lost only at start codons.
+    """
+    csq = np.full(len(ref_aa), csq_codes["missense_variant"])
+
+    csq[alt_aa == ref_aa] = csq_codes["synonymous_variant"]
+    csq[(ref_aa == "*") & (alt_aa == "*")] = csq_codes["stop_retained_variant"]
+    csq[(ref_aa == "*") & (alt_aa != "*")] = csq_codes["stop_lost"]
+    csq[(ref_aa != "*") & (alt_aa == "*")] = csq_codes["stop_gained"]
+    csq[start_codon & (ref_aa == "M") & (alt_aa != "M")] = csq_codes["start_lost"]
+
+    return csq
+
+def annotate_chrom(df, ref, chrom):
+    """ Annotate every possible SNV in the CDS of one chromosome.
+    Returns sorted SNV keys and consequence codes (the most severe per SNV).
+    """
+    x = cds_positions(df)
+
+    # Reference bases (upper case), on the + strand and the transcript strand
+    raw = ref.contexts(chrom, x.pos, flank=0)[:,0]
+    raw = np.where((raw >= ord("a")) & (raw <= ord("z")), raw - 32, raw)
+    plus_base = mutability.base_codes[raw].astype(np.int64)
+    minus = x.minus.to_numpy()
+    base = np.where(minus, 3 - plus_base, plus_base)
+
+    # Keep positions in complete codons of valid bases
+    codon, frame, tx = x.codon.to_numpy(), x.frame.to_numpy(), x.tx.to_numpy()
+    start_codon = (codon == 0) & x.complete_start.to_numpy()
+    first = np.arange(len(x)) - frame
+    last = np.minimum(first + 2, len(x) - 1)
+    keep = (codon >= 0) & (first + 2 < len(x)) & (tx[last] == tx) & (codon[last] == codon)
+
+    rows = np.flatnonzero(keep)
+    first = first[rows]
+    codon_bases = base[first[:,None] + np.arange(3)]
+    rows, first, codon_bases = [y[(codon_bases != mutability.invalid).all(axis=1)]
+        for y in (rows, first, codon_bases)]
+    ref_codon = codon_bases @ np.array([16, 4, 1])
+
+    keys, csqs = [], []
+    for shift in (1, 2, 3):
+        alt = (base[rows] + shift) % 4
+        alt_codon = ref_codon + (alt - base[rows]) * 4 ** (2 - frame[rows])
+
+        csqs.append(classify(
+            genetic_code[ref_codon], genetic_code[alt_codon], start_codon[rows]))
+        keys.append(vc.pack_codes(
+            vc.chrom_codes[chrom],
+            x.pos.to_numpy()[rows],
+            plus_base[rows],
+            np.where(minus[rows], 3 - alt, alt)
+            ))
+
+    keys, csqs = np.concatenate(keys), np.concatenate(csqs)
+
+    # The most severe consequence of each SNV
+    order = np.lexsort((csqs, keys))
+    keys, csqs = keys[order], csqs[order]
+    first = np.diff(keys, prepend=-1) != 0
+
+    return keys[first], csqs[first]
+
+def main(fasta=reference.grch38, out=output_dir):
+    """ Annotate every possible coding SNV, one chromosome at a time.
+    """
+    os.makedirs(out, exist_ok=True)
+
+    df = load_cds()
+    ref = reference.Reference(fasta)
+
+    for chrom, x in df.groupby("chrom", observed=True):
+        keys, csqs = annotate_chrom(x, ref, chrom)
+        np.save(os.path.join(out, f"{chrom}.key.npy"), keys)
+        np.save(os.path.join(out, f"{chrom}.csq.npy"), csqs)
+
+        print(f"{chrom}: {len(keys)} coding SNVs annotated")
+
+def read(df, keep=None, path=output_dir):
+    """ Get the consequences of SNVs (chrom, pos, ref, alt), as in
+    vep_cache.read. Optionally, keep only some consequences.
+    """
+    keys = vc.pack_keys(df.chrom, df.pos, df.ref, df.alt)
+
+    found = []
+    for chrom in pd.unique(df.chrom):
+        if not os.path.exists(os.path.join(path, f"{chrom}.key.npy")):
+            continue
+
+        stored = np.load(os.path.join(path, f"{chrom}.key.npy"), mmap_mode="r")
+        csq = np.load(os.path.join(path, f"{chrom}.csq.npy"), mmap_mode="r")
+
+        x = np.unique(keys[(df.chrom == chrom).to_numpy()])
+        i = np.searchsorted(stored, x)
+        i[i == len(stored)] = 0
+        hit = stored[i] == x
+
+        found.append(pd.DataFrame({"key": x[hit], "csq": np.asarray(csq[i[hit]])}))
+
+    found = pd.concat(found, ignore_index=True) if found else pd.DataFrame(columns=["key", "csq"])
+
+    df = vc.unpack_keys(found.key)
+    df["csq"] = np.array(consequences)[found.csq.to_numpy(np.int64)]
+
+    if keep is not None:
+        df = df[df.csq.isin(keep)]
+
+    return df
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 """
 This script annotates all of the coding positions in GENCODE.
+
+Coding positions are kept as merged intervals (one row per run of contiguous
+coding positions on a chromosome), rather than one row per position.
+Per-position arrays can be materialized on demand with iter_positions.
 """
 
 # Import the relevant modules
@@ -17,32 +21,57 @@ def main():
     data = "../outputs/coding_exons.tsv"
     df = nss.load_data(data)\
         .pipe(nss.autosomes_only)\
-        .pipe(coding_sites)
+        .pipe(coding_intervals)
 
-    output = "../outputs/coding_positions.tsv"
+    output = "../outputs/coding_intervals.tsv"
 
     df.to_csv(output, sep="\t", index=False)
 
     return df
 
-def coding_sites(df):
-    """ Annotate all of the coding positions in GENCODE.
+def coding_intervals(df):
+    """ Merge overlapping (and adjacent) CDS exons on each chromosome.
+    Intervals are 1-based and inclusive, as in the GTF.
     """
-    # Identify the coding positions
-    coding_positions = lambda x: list(range(x.start, x.end + 1))
+    df = df[["chrom", "start", "end"]]\
+        .sort_values(["chrom", "start"], ignore_index=True)
+
+    # A new interval starts wherever an exon starts after the furthest end of
+    # all the previous exons on the same chromosome.
+    max_end = df.groupby("chrom", observed=True).end.cummax()
+    prev_end = max_end.groupby(df.chrom, observed=True).shift()
+    new_interval = ~(df.start <= prev_end + 1)
 
-    df["pos"] = df.apply(coding_positions, axis=1)
+    df = df.groupby(new_interval.cumsum(), observed=True)\
+        .agg(chrom=("chrom", "first"), start=("start", "min"), end=("end", "max"))\
+        .reset_index(drop=True)\
+        .astype({"start":np.int32, "end":np.int32})
 
-    # Subset to the relevant columns
-    # Explode so that each position is represented in one row
-    # Keep only one representation for each position
-    df = df[["chrom","pos","strand"]]\
-        .explode("pos", ignore_index=True)\
-        .drop_duplicates(subset=["chrom","pos"])
+    n_positions = (df.end - df.start + 1).sum()
 
-    print(f"There are {len(df)} distinct coding positions in GENCODE.")
+    print(f"There are {n_positions} distinct coding positions in GENCODE, in {len(df)} intervals.")
 
     return df
 
+def iter_positions(df, chunksize=10000000):
+    """ Materialize the positions in a set of merged intervals.
+    Yields (chrom, positions) for each chromosome, where positions is a sorted
+    int32 array of (at most about) chunksize positions.
+    """
+    for chrom, intervals in df.groupby("chrom", observed=True, sort=False):
+        start = intervals.start.to_numpy(np.int64)
+        length = intervals.end.to_numpy(np.int64) - start + 1
+
+        # Split the intervals into chunks of roughly chunksize positions
+        chunk = np.cumsum(length) // chunksize
+        bounds = np.flatnonzero(np.diff(chunk)) + 1
+
+        for s, l in zip(np.split(start, bounds), np.split(length, bounds)):
+            # Positions are a running count, offset at the start of each interval
+            offset = np.repeat(s - np.cumsum(np.concatenate([[0], l[:-1]])), l)
+            positions = (np.arange(l.sum()) + offset).astype(np.int32)
+
+            yield chrom, positions
+
 if __name__ == "__main__":
     main()
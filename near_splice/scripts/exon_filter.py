@@ -13,6 +13,14 @@ Filtering criteria:
 # Import the relevant modules
 import numpy as np
 import pandas as pd
+import annotation_cache
+import gtf_attributes as ga
+
+tags = (["CCDS",
+	"appris_principal_1",
+	"appris_candidate_longest",
+	"appris_candidate",
+	"exp_conf"])
 
 def main():
 	""" Run every function in this script.
@@ -20,14 +28,24 @@ def main():
 	gencode_path = "/public_data_resources/GENCODE/v29/GRCh38/gencode.v29.annotation.gtf"
 	output_path = "../outputs/coding_exons.tsv"
 
-	df = read_gtf(gencode_path)\
-		.pipe(cds_filter, feature="CDS")\
-		.pipe(write_output, path=output_path)
+	# The parsed annotation is cached, keyed by the GTF checksum and the filters
+	df = annotation_cache.cached(
+		lambda: read_filtered_gtf(gencode_path, feature="CDS"),
+		source=gencode_path,
+		settings={"feature":"CDS", "tags":tags},
+		name="coding_exons"
+		)
+
+	print(f"{len(df)} CDS features meet the filtering criteria.") # n = 401314
+
+	write_output(df, path=output_path)
 
 	return df
 
-def read_gtf(path):
+def read_gtf(path, chunksize=None):
 	""" Read a .gtf file to memory.
+	If chunksize is given, return an iterator over dataframes of (at most)
+	chunksize lines instead.
 	"""
 	names = (["chrom", "source", "feature", "start", "end", "score", "strand",
 		"phase","attr"])
@@ -37,33 +55,38 @@ def read_gtf(path):
 		sep="\t",
 		comment="#",
 		header=None,
-		names = names
+		names = names,
+		chunksize = chunksize
 		)
 
 	return df
 
+def read_filtered_gtf(path, feature, chunksize=500000):
+	""" Stream a .gtf file in chunks, applying the CDS filters to each chunk.
+	Only the rows which pass the filters are kept in memory, so peak memory
+	depends on the chunksize and the filtered subset, not the whole annotation.
+	"""
+	chunks = (cds_filter(chunk, feature) for chunk in read_gtf(path, chunksize))
+
+	df = pd.concat(chunks, ignore_index=True)
+
+	return df
+
 def cds_filter(df, feature):
 	""" Filter for CDS exons meeting certain criteria
 	"""
 	df = df[df.feature==feature]
 
-	tags = (['tag "CCDS"',
-		'tag "appris_principal_1"',
-	 	'tag "appris_candidate_longest"',
-		'tag "appris_candidate"',
-		'tag "exp_conf"'])
+	# Parse the attributes once; tags are compared as a bitmask
+	attr = ga.parse_attributes(df.attr, ["gene_type", "transcript_type", "level", "tags"])
 
-	tags = "|".join(tags) # For OR filtering in mask4, below.
-
-	mask1 = df.attr.str.contains('gene_type "protein_coding"')
-	mask2 = df.attr.str.contains('transcript_type "protein_coding"')
-	mask3 = df.attr.str.contains('; level 3;')
-	mask4 = df.attr.str.contains(tags)
+	mask1 = attr.gene_type == "protein_coding"
+	mask2 = attr.transcript_type == "protein_coding"
+	mask3 = attr.level == 3
+	mask4 = (attr.tags & ga.tag_mask(*tags)) != 0 # OR filtering
 
 	df = df[mask1 & mask2 & ~mask3 & mask4]
 
-	print(f"{len(df)} {feature} features meet the filtering criteria.") # n = 401314
-
 	return df
 
 def write_output(df, path):
@@ -2,40 +2,120 @@
 
 #BSUB -q medium
 #BSUB -P re_gecip_machine_learning
-#BSUB -J "MAPS_snvs_[1-1371]"
+#BSUB -J "MAPS_snvs_[1-200]"
 #BSUB -R "rusage[mem=8000]"
 #BSUB -M 8000
 #BSUB -e ../outputs/MAPS_snvs/hpc_err/%J_%I_err.txt
 #BSUB -o ../outputs/MAPS_snvs/hpc_out/%J_%I_out.txt
 
-# This script extracts all SNVs in near-splice and coding regions for 26,660
-# unaffected parents in GEL.
+# This script extracts all SNVs in near-splice, coding and branchpoint regions
+# for 26,660 unaffected parents in GEL. Each chunk is decoded once, over the
+# union of all the region sets, and each SNV is routed to the output of every
+# region set it falls in (see maps_targets.py). Each job extracts the chunks
+# assigned to it by the job plan (see job_plan.py). Chunks with sparse targets
+# are read by seeking to each target interval with the chunk's index (-R),
+# and the rest by streaming through the chunk (-T).
 
 module load bio/BCFtools/1.9-foss-2019b
 
-function extract_snvs {
+set -o pipefail # A failed bcftools command fails the pipe
+
+# Verbose format: the genotype, depth, genotype quality and allelic depths of
+# every carrier, as text
+function extract_snvs_verbose {
   bcftools view \
     -v snps \
     -S ${unaffected_parent_samples} \
     -O u \
-    -T "../outputs/${region}_positions_for_bcftools.tsv" \
+    ${targets} \
     ${agg_vcf_chunk} | \
   bcftools query \
     -i "FILTER='PASS' & GT='alt'" \
-    -f '%CHROM\t%POS\t%REF\t%ALT\t%FILTER\t%INFO/AN\t%INFO/AC\t[%SAMPLE,%GT,%DP,%GQ,%AD;]\n' # | \
+    -f '%CHROM\t%POS\t%REF\t%ALT\t%FILTER\t%INFO/AN\t%INFO/AC\t[%SAMPLE,%GT,%DP,%GQ,%AD;]\n'
 }
 
-# Get a VCF chunk, depending on the job index
-agg_vcf_chunks="../data/aggV2_vcf_file_paths.tsv"
-agg_vcf_chunk=`sed -n "${LSB_JOBINDEX}p" ${agg_vcf_chunks} | awk '{print $(NF-1)}'`
+# Compact format: allele counts and carrier counts only, as fixed-width
+# binary records (see allele_counts.py)
+function extract_snvs_compact {
+  bcftools view \
+    -v snps \
+    -S ${unaffected_parent_samples} \
+    -O u \
+    ${targets} \
+    ${agg_vcf_chunk} | \
+  bcftools +fill-tags -O u -- -t AC_Het,AC_Hom | \
+  bcftools query \
+    -i "FILTER='PASS' & GT='alt'" \
+    -f '%CHROM\t%POS\t%REF\t%ALT\t%INFO/AN\t%INFO/AC\t%INFO/AC_Het\t%INFO/AC_Hom\n'
+}
+
+# Route each SNV to the output of each region set it is in (compact outputs
+# are converted to fixed-width records)
+function extract_snvs {
+  extract_snvs_${format} | \
+  python3 maps_targets.py route ${format} "${out_dir}/{region}/{region}_snvs_${chunk}${ext}.tmp" ${regions}
+}
+
+# Move a finished output into place, and mark it as done with its row count,
+# size and checksum (see snv_manifest.py). Rows are fixed-width records in
+# compact outputs, and lines in verbose outputs.
+function finish {
+  size=`stat -c %s "$1.tmp"`
+  if [ ${format} == "compact" ]; then
+    if [ $((size % record_size)) -ne 0 ]; then
+      echo "$1.tmp is not a whole number of ${record_size} byte records" >&2
+      return 1
+    fi
+    rows=$((size / record_size))
+  else
+    rows=`wc -l < "$1.tmp"`
+  fi
+  md5=`md5sum "$1.tmp" | cut -d " " -f 1`
+  mv "$1.tmp" "$1" && \
+  printf "%s\t%s\t%s\n" ${rows} ${size} ${md5} > "$1.ok"
+}
+
+# The job plan gives the VCF chunks of each job, with their extraction mode
+# and coordinates (see job_plan.py)
+job_plan="../outputs/MAPS_snvs/job_plan.tsv"
+all_targets="../outputs/MAPS_targets.tsv"
+chunk_targets="${TMPDIR:-/tmp}/MAPS_targets_${LSB_JOBID}_${LSB_JOBINDEX}.tsv"
 
 unaffected_parent_samples="../outputs/unaffected_RD_parents.tsv"
 
-regions=( "near_splice" "coding" )
+# Output format, set by the wrapper script: "compact" (default) or "verbose"
+format=${snv_format:-compact}
+if [ ${format} == "compact" ]; then ext=".bin"; else ext=".tsv"; fi
+record_size=`python3 -c "import allele_counts; print(allele_counts.dtype.itemsize)"`
+
+# Region sets, set by the wrapper script
+regions=${snv_regions:-"near_splice coding branch"}
+out_dir="../outputs/MAPS_snvs/out"
 
-for region in ${regions[@]}
+# Extract each chunk of this job in turn (the plan is read on its own file
+# descriptor, so that nothing in the loop reads from it)
+while read -r -u 3 chunk mode agg_vcf_chunk chrom start end
 do
-  extract_snvs > "../outputs/MAPS_snvs/out/${region}/${region}_snvs_${LSB_JOBINDEX}" &
-done
-wait
+  # Seek to each target interval in the chunk, or stream through the chunk
+  if [ ${mode} == "seek" ]; then
+    awk -F "\t" -v chrom=${chrom} -v start=${start} -v end=${end} \
+      '$1 == chrom && $3 >= start && $2 <= end' ${all_targets} > ${chunk_targets}
+    targets="-R ${chunk_targets}"
+  else
+    targets="-T ${all_targets}"
+  fi
+
+  for region in ${regions}
+  do
+    rm -f "${out_dir}/${region}/${region}_snvs_${chunk}${ext}.ok" # In case of a re-run
+  done
+
+  extract_snvs && \
+  for region in ${regions}
+  do
+    finish "${out_dir}/${region}/${region}_snvs_${chunk}${ext}"
+  done
+done 3< <(awk -F "\t" -v job=${LSB_JOBINDEX} \
+  'NR > 1 && $1 == job {print $2"\t"$3"\t"$4"\t"$5"\t"$6"\t"$7}' ${job_plan})
+rm -f ${chunk_targets}
 echo "All done."
@@ -2,27 +2,59 @@
 
 ## This is a wrapper script for the main extract_parent_snvs.sh script
 ## The array job takes ~3 days to run on the HPC.
+## Chunks with verified outputs are kept, so re-running this script only
+## re-submits the chunks which are missing or failed (see snv_manifest.py).
+## Usage: bash extract_parent_snvs_wrapper.sh [compact|verbose]
+## The compact format (default) keeps only the allele counts of each SNV (see
+## allele_counts.py). The verbose format keeps every carrier's genotype.
+## Each chunk is decoded once for all of the region sets (near-splice, coding
+## and branchpoint), so the branchpoint SNVs are also extracted here. The
+## branchpoint position index must be built first (see branchpoints/run_all.sh).
+## Chunks with no target positions are skipped, and the rest are grouped into
+## jobs of similar size (see job_plan.py).
+## Jobs are run on LSF by default, or on this machine with SCHEDULER=local
+## (see scheduler.py).
 
 dir="../outputs/MAPS_snvs"
 dir_hpc_out="${dir}/hpc_out"
 dir_hpc_err="${dir}/hpc_err"
 dir_out="${dir}/out"
 
-# Empty the output directories
-rm -r ${dir}; \
-mkdir ${dir} && \
-mkdir ${dir_hpc_out} && \
-mkdir ${dir_hpc_err} && \
-mkdir ${dir_out} && \
-mkdir "${dir_out}/near_splice" && \
-mkdir "${dir_out}/coding"
+# Output format, passed to the array job through the environment
+export snv_format=${1:-compact}
+if [ ${snv_format} == "compact" ]; then ext=".bin"; else ext=".tsv"; fi
 
-# Submit the array job to the HPC
-bsub < extract_parent_snvs.sh
+# Region sets, passed to the array job through the environment
+export snv_regions="near_splice coding branch"
 
-# Wait for the job to complete before advancing
-bwait -w 'ended(MAPS_snvs_)'
+# Make the output directories, if needed
+mkdir -p ${dir_hpc_out} ${dir_hpc_err}
+outputs=""
+for region in ${snv_regions}
+do
+  mkdir -p "${dir_out}/${region}"
+  outputs="${outputs} ${dir_out}/${region}/${region}_snvs_{}${ext}"
+done
 
-# Concatenate the outputs
-cat ../outputs/MAPS_snvs/out/coding/* > ../outputs/unaff_parents_coding_snvs.tsv
-cat ../outputs/MAPS_snvs/out/near_splice/* > ../outputs/unaff_parents_near_splice_snvs.tsv
+plan="${dir}/job_plan.tsv"
+scheduler="python3 scheduler.py"
+manifest="python3 snv_manifest.py --plan ${plan} --manifest ${dir}/manifest.tsv"
+
+# Get the combined target intervals of all the region sets, and plan the jobs
+python3 maps_targets.py targets ${snv_regions}
+python3 job_plan.py --plan ${plan} ${snv_regions}
+
+# Run the jobs with missing or failed chunks (up to 3 attempts), and wait for
+# them to complete before checking again
+for attempt in 1 2 3
+do
+  pending=`${manifest} pending ${outputs}`
+  if [ -z "${pending}" ]; then break; fi
+
+  ${scheduler} --name MAPS_snvs_ extract_parent_snvs.sh ${pending}
+done
+
+# Concatenate the outputs, only if every chunk is verified
+${manifest} concat "${dir_out}/coding/coding_snvs_{}${ext}" ../outputs/unaff_parents_coding_snvs${ext} && \
+${manifest} concat "${dir_out}/near_splice/near_splice_snvs_{}${ext}" ../outputs/unaff_parents_near_splice_snvs${ext} && \
+${manifest} concat "${dir_out}/branch/branch_snvs_{}${ext}" ../../branchpoints/outputs/unaff_parents_branch_snvs${ext}
@@ -0,0 +1,146 @@
+"""
+This script finds the genes (and transcripts) which overlap a batch of
+variants, from the GENCODE annotation, without VEP.
+
+Transcript intervals are sorted by start on each chromosome, with the running
+maximum of their ends. The transcripts which may overlap a position are then
+a contiguous run of rows: from the first row whose running maximum end
+reaches the position, to the last row which starts before it. Both ends of
+the run are found with np.searchsorted, for a whole batch of positions at
+once, and the candidates are then filtered on their own ends.
+
+As with VEP, a flank can be given, so that transcripts within that distance
+upstream or downstream of a variant are also reported (VEP's default is
+5,000bp). Each variant gets one transcript per gene: the nearest, then the
+longest. Genes are mapped to HGNC IDs with the HGNC complete set.
+
+Gene and transcript IDs are returned without their version suffix (e.g.
+ENSG00000141510, not ENSG00000141510.16), as VEP reports them, so that they
+join with VEP output.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+import annotation_cache
+import exon_filter as ef
+import gtf_attributes as ga
+
+gencode = "/public_data_resources/GENCODE/v29/GRCh38/gencode.v29.annotation.gtf"
+hgnc = "../data/hgnc_complete_set.txt"
+
+def read_transcripts(path=gencode, chunksize=500000):
+    """ Read the transcript intervals (1-based, inclusive) from a GENCODE .gtf,
+    with their gene and transcript IDs (without versions).
+    """
+    chunks = []
+    for df in ef.read_gtf(path, chunksize):
+        df = df[df.feature == "transcript"]
+        attr = ga.parse_attributes(df.attr, ["gene_id", "transcript_id"])
+
+        chunks.append(pd.DataFrame({
+            "chrom": df.chrom.to_numpy(),
+            "start": df.start.to_numpy(np.int32),
+            "end": df.end.to_numpy(np.int32),
+            "ensg": attr.gene_id.astype(str).str.split(".").str[0].to_numpy(),
+            "enst": attr.transcript_id.astype(str).str.split(".").str[0].to_numpy(),
+            }))
+
+    return pd.concat(chunks, ignore_index=True)
+
+def read_hgnc(path=hgnc):
+    """ Map Ensembl gene IDs (without version) to HGNC IDs (as numbers).
+    """
+    df = pd.read_csv(
+        path,
+        sep="\t",
+        usecols=["hgnc_id", "ensembl_gene_id"],
+        dtype=str
+        )\
+        .dropna()\
+        .drop_duplicates("ensembl_gene_id")
+
+    return pd.Series(
+        df.hgnc_id.str.slice(5).astype(float).to_numpy(),
+        index=df.ensembl_gene_id.to_numpy()
+        )
+
+class GeneIndex:
+    """ Transcript intervals sorted by start per chromosome, with the running
+    maximum of their ends.
+    """
+    def __init__(self, df, hgnc_ids=None):
+        df = df.sort_values(["chrom", "start"], ignore_index=True)
+        df["length"] = df.end - df.start + 1
+
+        if hgnc_ids is not None:
+            df["hgnc_id"] = df.ensg.map(hgnc_ids)
+
+        self.transcripts = df
+        self.rows = {chrom: rows for chrom, rows in df.groupby("chrom").indices.items()}
+        self.starts = {chrom: df.start.to_numpy()[rows] for chrom, rows in self.rows.items()}
+        self.ends = {chrom: df.end.to_numpy()[rows] for chrom, rows in self.rows.items()}
+        self.max_ends = {chrom: np.maximum.accumulate(x) for chrom, x in self.ends.items()}
+
+    def overlaps(self, chrom, pos, flank=0):
+        """ Find the transcripts within flank bp of positions on one chromosome.
+        Returns the index of each position, the row of each transcript (in
+        self.transcripts), and the distance between them (0 if overlapping).
+        """
+        pos = np.asarray(pos, dtype=np.int64)
+        if chrom not in self.rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+
+        starts, ends = self.starts[chrom], self.ends[chrom]
+
+        # Candidate rows: from the first transcript which may reach the
+        # position, to the last which starts before it
+        first = np.searchsorted(self.max_ends[chrom], pos - flank, side="left")
+        last = np.searchsorted(starts, pos + flank, side="right")
+        n = np.maximum(last - first, 0)
+
+        query = np.repeat(np.arange(len(pos)), n)
+        i = np.repeat(first - np.cumsum(n) + n, n) + np.arange(n.sum())
+
+        distance = np.maximum(starts[i] - pos[query], 0) + np.maximum(pos[query] - ends[i], 0)
+        hit = distance <= flank
+
+        return query[hit], self.rows[chrom][i[hit]], distance[hit]
+
+    def annotate(self, df, flank=0):
+        """ Annotate variants (chrom, pos) with the genes within flank bp, one row
+        per variant and gene. Variants with no genes are dropped.
+        """
+        matches = []
+        for chrom, rows in df.groupby("chrom", sort=False).indices.items():
+            query, tx, distance = self.overlaps(chrom, df.pos.to_numpy()[rows], flank)
+            matches.append(pd.DataFrame({"row": rows[query], "tx": tx, "distance": distance}))
+
+        matches = pd.concat(matches, ignore_index=True) if matches else\
+            pd.DataFrame({"row": [], "tx": [], "distance": []}, dtype=np.int64)
+        genes = self.transcripts.iloc[matches.tx].reset_index(drop=True)
+        matches = pd.concat([matches, genes.drop(columns=["chrom", "start", "end"])], axis=1)
+
+        # One transcript per gene: the nearest, then the longest
+        matches = matches.sort_values(["row", "distance", "length"], ascending=[True, True, False])\
+            .drop_duplicates(["row", "ensg"])\
+            .drop(columns=["tx", "distance", "length"])
+
+        return df.reset_index(drop=True)\
+            .iloc[matches.row]\
+            .reset_index(drop=True)\
+            .join(matches.drop(columns="row").reset_index(drop=True))
+
+def load(gtf=gencode, hgnc_path=hgnc):
+    """ Build the index from GENCODE transcripts (cached after the first run)
+    and HGNC IDs.
+    """
+    df = annotation_cache.cached(
+        lambda: read_transcripts(gtf),
+        source=gtf,
+        settings={"feature":"transcript", "versions":False},
+        name="gene_index"
+        )
+
+    return GeneIndex(df, read_hgnc(hgnc_path))
@@ -0,0 +1,77 @@
+"""
+This script gets the reference allele and trinucleotide sequence context for
+each position of interest, from the GRCh38 reference FASTA (see reference.py).
+Sequence contexts are given in the + strand.
+
+Output format (one row per position, sorted by chrom and pos):
+    chrom   pos     context
+    chr1    926003  TCC
+
+Usage (from a scripts directory):
+    python3 get_contexts.py near_splice coding
+    python3 ../../near_splice/scripts/get_contexts.py branch
+"""
+
+# Import the relevant modules
+import sys
+import numpy as np
+import pandas as pd
+import coding_sites as cs
+import reference
+
+def near_splice_positions(path="../outputs/near_splice_positions.tsv"):
+    """ Get the near-splice positions for each chromosome.
+    """
+    df = pd.read_csv(path, sep="\t", usecols=["chrom","pos"])\
+        .sort_values(by=["chrom","pos"])
+
+    for chrom, x in df.groupby("chrom", sort=False):
+        yield chrom, x.pos.to_numpy()
+
+def coding_positions(path="../outputs/coding_intervals.tsv"):
+    """ Get the coding positions for each chromosome, in chunks.
+    """
+    df = pd.read_csv(path, sep="\t").sort_values(by=["chrom","start"])
+
+    return cs.iter_positions(df)
+
+def branch_positions(path="../outputs/branchpoints.bed"):
+    """ Get the positions near branchpoints for each chromosome.
+    """
+    df = pd.read_csv(
+        path,
+        sep="\t",
+        header=None,
+        names=["chrom","start","end","site","score","strand"],
+        usecols=["chrom","end"]
+        )
+    df["pos"] = df.end - 1
+    df = df.sort_values(by=["chrom","pos"])
+
+    for chrom, x in df.groupby("chrom", sort=False):
+        yield chrom, x.pos.to_numpy()
+
+positions = {
+    "near_splice": near_splice_positions,
+    "coding": coding_positions,
+    "branch": branch_positions,
+    }
+
+def get_contexts(region, fasta=reference.grch38):
+    """ Write the sequence context of every position in a region to .tsv
+    """
+    print(f"Retrieving {region} sequences")
+
+    ref = reference.Reference(fasta)
+
+    with open(f"../outputs/{region}_contexts.tsv", "w") as output:
+        output.write("chrom\tpos\tcontext\n")
+
+        for chrom, pos in positions[region]():
+            contexts = reference.to_strings(ref.contexts(chrom, pos))
+            pd.DataFrame({"chrom":chrom, "pos":pos, "context":contexts})\
+                .to_csv(output, sep="\t", index=False, header=False)
+
+if __name__ == "__main__":
+    for region in sys.argv[1:] or ["near_splice", "coding"]:
+        get_contexts(region)
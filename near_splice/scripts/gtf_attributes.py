@@ -0,0 +1,95 @@
+"""
+This script parses the attributes column of a GENCODE .gtf file.
+
+Attributes are extracted by key rather than by position, with one pass over
+the attribute strings per key, so only the keys which are needed are parsed.
+The "tag" attribute may be repeated, so tags are returned as a bitmask: one
+bit per known tag (see tags, below). Tags which are not in this list are
+ignored.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+
+# Keys with a single value per feature, and the dtype to convert them to.
+keys = {
+    "gene_id":"category",
+    "transcript_id":"category",
+    "exon_id":"category",
+    "exon_number":"Int16",
+    "gene_type":"category",
+    "transcript_type":"category",
+    "level":"Int8",
+    }
+
+# Known GENCODE tags. The bit for each tag is given by its position in the list.
+tags = ["basic", "CCDS", "Ensembl_canonical", "MANE_Select",
+    "appris_principal_1", "appris_principal_2", "appris_principal_3",
+    "appris_principal_4", "appris_principal_5", "appris_alternative_1",
+    "appris_alternative_2", "appris_candidate", "appris_candidate_longest",
+    "appris_candidate_highest_score", "exp_conf", "mRNA_start_NF",
+    "mRNA_end_NF", "cds_start_NF", "cds_end_NF", "seleno",
+    "readthrough_transcript", "non_canonical_conserved",
+    "non_canonical_genome_sequence_error", "non_canonical_other",
+    "non_canonical_polymorphism", "non_canonical_TEC",
+    "non_canonical_U12", "retained_intron_CDS", "NMD_exception",
+    "alternative_3_UTR", "alternative_5_UTR", "PAR"]
+
+tag_bits = {tag: np.uint64(1) << np.uint64(i) for i, tag in enumerate(tags)}
+
+def value_pattern(key):
+    """ Match the first value of a key: key "quoted value"; or key value;
+    """
+    return rf'(?:^|;)\s*{key} (?:"([^"]*)"|([^;"]*));'
+
+tag_pattern = r'(?:^|;)\s*tag "([^"]*)"'
+tag_index = {tag: i for i, tag in enumerate(tags)}
+
+def tag_mask(*names):
+    """ Get the bitmask for one or more tags.
+    """
+    mask = np.uint64(0)
+    for name in names:
+        mask |= tag_bits[name]
+
+    return mask
+
+def parse_tags(attr):
+    """ Combine the known tags of each attribute string into a bitmask.
+    """
+    found = pd.Series(attr.str.findall(tag_pattern).to_numpy()).explode()
+    bit = found.map(tag_index).dropna()
+
+    mask = np.zeros(len(attr), dtype=np.uint64)
+    np.bitwise_or.at(
+        mask,
+        bit.index.to_numpy(np.int64),
+        np.uint64(1) << bit.to_numpy(np.uint64)
+        )
+
+    return pd.Series(mask, index=attr.index)
+
+def parse_attributes(attr, names=None):
+    """ Extract the named keys and tags from a series of .gtf attribute strings.
+    Returns a dataframe with the same index as attr, and one column per key,
+    plus a "tags" bitmask column. Optionally, extract only some of these
+    columns (names).
+    """
+    names = list(keys) + ["tags"] if names is None else names
+
+    df = pd.DataFrame(index=attr.index)
+    for key in names:
+        if key == "tags":
+            df["tags"] = parse_tags(attr)
+            continue
+
+        # One pass per key, keeping only its first value
+        value = attr.str.extract(value_pattern(key))
+        value = value[0].fillna(value[1])
+
+        if keys[key] != "category":
+            value = pd.to_numeric(value)
+        df[key] = value.astype(keys[key])
+
+    return df
@@ -0,0 +1,163 @@
+"""
+This script plans the parent SNV extraction array jobs (extract_parent_snvs.sh)
+from the overlap of the aggV2 chunks with the target positions.
+
+The coordinates of each chunk are parsed from its file name (e.g.
+..._chr1_1_1000000.vcf.gz), and the target positions of the region sets (see
+maps_targets.py) in each chunk are counted from their position indexes.
+Chunks with no target positions are dropped. The remaining chunks are grouped
+into jobs of similar estimated work (target positions x samples), by greedily
+assigning the chunks, largest first, to the job with the least work so far.
+
+Each chunk is also given an extraction mode, by the density of its target
+intervals (runs of consecutive target positions):
+- seek: bcftools view -R, which uses the chunk's index to read only the
+  compressed blocks overlapping each interval. Best for sparse targets (e.g.
+  branchpoint windows), as almost none of the chunk is decoded.
+- stream: bcftools view -T, which decodes every record and filters them. Best
+  for dense targets, where one index lookup per interval costs more than
+  reading through.
+
+The plan (one row per chunk) is written to job_plan.tsv:
+    job  chunk  mode  path  chrom  start  end  targets  intervals  work
+Chunks keep their line number in the chunk list, so their outputs are named
+as before.
+
+Usage (from near_splice/scripts):
+    python3 job_plan.py --jobs 200 --max-seeks 1000 near_splice coding branch
+"""
+
+# Import the relevant modules
+import argparse
+import heapq
+import re
+import numpy as np
+import pandas as pd
+import maps_targets as mt
+
+chunks_path = "../data/aggV2_vcf_file_paths.tsv"
+samples_path = "../outputs/unaffected_RD_parents.tsv"
+plan_path = "../outputs/MAPS_snvs/job_plan.tsv"
+
+chunk_coords = re.compile(r"_(chr[0-9XYM]+)_(\d+)_(\d+)\.vcf\.gz$")
+
+def read_chunks(path=chunks_path):
+    """ Read the chunk list, and parse the coordinates of each chunk from its
+    file name. The path is the second to last column, as in
+    extract_parent_snvs.sh.
+    """
+    with open(path) as f:
+        paths = [line.split()[-2] for line in f if line.strip()]
+
+    records = []
+    for chunk, chunk_path in enumerate(paths, start=1):
+        match = chunk_coords.search(chunk_path)
+        if match is None:
+            raise ValueError(f"No coordinates in chunk file name: {chunk_path}")
+
+        chrom, start, end = match.groups()
+        records.append((chunk, chunk_path, chrom, int(start), int(end)))
+
+    return pd.DataFrame(records, columns=["chunk","path","chrom","start","end"])
+
+def count_targets(chunks, positions):
+    """ Count the target positions within each chunk (start and end inclusive).
+    """
+    targets = np.zeros(len(chunks), dtype=np.int64)
+
+    for chrom, rows in chunks.groupby("chrom").indices.items():
+        pos = positions.get(chrom)
+        if pos is None:
+            continue
+
+        x = chunks.iloc[rows]
+        targets[rows] = np.searchsorted(pos, x.end, side="right")\
+            - np.searchsorted(pos, x.start, side="left")
+
+    return targets
+
+def count_intervals(chunks, intervals):
+    """ Count the target intervals overlapping each chunk.
+    """
+    counts = np.zeros(len(chunks), dtype=np.int64)
+
+    for chrom, rows in chunks.groupby("chrom").indices.items():
+        x = intervals[intervals.chrom == chrom]
+        if len(x) == 0:
+            continue
+
+        c = chunks.iloc[rows]
+        counts[rows] = np.searchsorted(x.start.to_numpy(), c.end, side="right")\
+            - np.searchsorted(x.end.to_numpy(), c.start, side="left")
+
+    return counts
+
+def extraction_mode(chunks, max_seeks):
+    """ Seek to each target interval if there are at most max_seeks target
+    intervals per Mb of the chunk, else stream through the chunk.
+    """
+    per_mb = chunks.intervals / ((chunks.end - chunks.start + 1) / 1e6)
+
+    return np.where(per_mb <= max_seeks, "seek", "stream")
+
+def n_samples(path=samples_path):
+    """ Count the samples (one per line).
+    """
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+def pack(work, n_jobs):
+    """ Assign items to jobs of similar total work, largest items first, each
+    to the job with the least work so far. Jobs are numbered from 1.
+    """
+    n_jobs = max(1, min(n_jobs, len(work)))
+    jobs = [(0, job) for job in range(1, n_jobs + 1)]
+
+    assigned = np.zeros(len(work), dtype=np.int64)
+    for i in np.argsort(-np.asarray(work), kind="mergesort"):
+        load, job = heapq.heappop(jobs)
+        assigned[i] = job
+        heapq.heappush(jobs, (load + work[i], job))
+
+    return assigned
+
+def plan(regions, n_jobs, max_seeks=1000, chunks=chunks_path, samples=samples_path):
+    """ Drop the chunks with no target positions, group the rest into jobs,
+    and choose the extraction mode of each chunk.
+    """
+    df = read_chunks(chunks)
+    indexes = mt.load_indexes(regions)
+
+    df["targets"] = count_targets(df, mt.union_positions(indexes))
+    df["intervals"] = count_intervals(df, mt.union_intervals(indexes))
+    df["work"] = df.targets * n_samples(samples)
+
+    df = df[df.targets > 0].reset_index(drop=True)
+    df.insert(0, "job", pack(df.work.to_numpy(), n_jobs))
+    df.insert(2, "mode", extraction_mode(df, max_seeks))
+
+    return df.sort_values(["job","chunk"])
+
+def write_plan(df, path=plan_path):
+    """ Save the plan, and summarise it.
+    """
+    df.to_csv(path, sep="\t", index=False)
+
+    work = df.groupby("job").work.sum()
+    print(f"{len(df)} chunks with targets, in {len(work)} jobs "
+        f"(work per job: {work.min()} to {work.max()}; "
+        f"{(df['mode'] == 'seek').sum()} chunks to seek)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--max-seeks", type=float, default=1000,
+        help="Most target intervals per Mb to extract by seeking")
+    parser.add_argument("--chunks", default=chunks_path)
+    parser.add_argument("--samples", default=samples_path)
+    parser.add_argument("--plan", default=plan_path)
+    parser.add_argument("regions", nargs="+")
+    args = parser.parse_args()
+
+    df = plan(args.regions, args.jobs, args.max_seeks, args.chunks, args.samples)
+    write_plan(df, args.plan)
@@ -0,0 +1,124 @@
+"""
+This script combines the positions of interest of every region set (e.g.
+near-splice, coding, and branchpoint positions) into one target set for the
+parent SNV extraction, and routes the extracted SNVs to per-region outputs.
+
+Each aggV2 chunk is then decoded once (bcftools view -T over the union of all
+the region sets), rather than once per region set. Each SNV is labelled with
+the region sets it falls in by looking it up in their position indexes (see
+position_index.py), and written to the output of every region set it is in.
+
+Usage (from near_splice/scripts):
+    python3 maps_targets.py targets near_splice coding branch
+        Writes the merged target intervals (CHROM, BEG, END; 1-based and
+        inclusive) for bcftools -T.
+    bcftools query ... | python3 maps_targets.py route FORMAT OUTPUT near_splice coding branch
+        Routes bcftools query output (compact or verbose format, see
+        allele_counts.py) to one output per region set. OUTPUT is a template
+        with "{region}" for the region set.
+"""
+
+# Import the relevant modules
+import io
+import itertools
+import sys
+import numpy as np
+import pandas as pd
+import allele_counts as ac
+import position_index as pi
+
+region_sets = {
+    "near_splice": "../../near_splice/outputs",
+    "coding": "../../near_splice/outputs",
+    "branch": "../../branchpoints/outputs",
+    }
+
+targets_path = "../outputs/MAPS_targets.tsv"
+
+def load_indexes(regions):
+    """ Open the position index of each region set.
+    """
+    return {region: pi.load(region, region_sets[region]) for region in regions}
+
+def union_positions(indexes):
+    """ Get the sorted, unique positions of all region sets, per chromosome.
+    """
+    chroms = sorted(set(itertools.chain(*[x.positions for x in indexes.values()])))
+
+    return {
+        chrom: np.unique(np.concatenate([
+            x.positions[chrom] for x in indexes.values() if chrom in x.positions
+            ]))
+        for chrom in chroms
+        }
+
+def union_intervals(indexes):
+    """ Merge the positions of all region sets into intervals of consecutive
+    positions (1-based, inclusive).
+    """
+    intervals = []
+    for chrom, pos in union_positions(indexes).items():
+        breaks = np.flatnonzero(np.diff(pos) > 1) + 1
+        starts = pos[np.concatenate([[0], breaks])]
+        ends = pos[np.concatenate([breaks - 1, [len(pos) - 1]])]
+
+        intervals.append(pd.DataFrame({"chrom": chrom, "start": starts, "end": ends}))
+
+    return pd.concat(intervals, ignore_index=True)
+
+def write_targets(regions, path=targets_path):
+    """ Write the merged target intervals of the region sets.
+    """
+    df = union_intervals(load_indexes(regions))
+    df.to_csv(path, sep="\t", index=False, header=False)
+
+    print(f"{len(df)} target intervals for {', '.join(regions)}")
+
+def read_lines(source, chunksize):
+    """ Read a text stream in chunks of lines.
+    """
+    while True:
+        lines = list(itertools.islice(source, chunksize))
+        if not lines:
+            break
+        yield lines
+
+def route(fmt, output, regions, source=sys.stdin, chunksize=500000):
+    """ Write each extracted SNV to the output of each region set it is in.
+    Compact outputs are converted to fixed-width records (see allele_counts.py).
+    """
+    indexes = load_indexes(regions)
+    outputs = {region: open(output.format(region=region), "wb") for region in regions}
+
+    for lines in read_lines(source, chunksize):
+        if fmt == "compact":
+            df = pd.read_csv(
+                io.StringIO("".join(lines)),
+                sep="\t",
+                header=None,
+                names=ac.query_fields,
+                dtype={"chrom":str, "ref":str, "alt":str}
+                )
+            chrom, pos = df.chrom.to_numpy(), df.pos.to_numpy()
+            records = ac.to_records(df)
+        else:
+            fields = [line.split("\t", 2) for line in lines]
+            chrom = np.array([x[0] for x in fields])
+            pos = np.array([int(x[1]) for x in fields])
+
+        for region, index in indexes.items():
+            in_region = index.contains(chrom, pos)
+
+            if fmt == "compact":
+                outputs[region].write(records[in_region].tobytes())
+            else:
+                outputs[region].write("".join(itertools.compress(lines, in_region)).encode())
+
+    for f in outputs.values():
+        f.close()
+
+if __name__ == "__main__":
+    if sys.argv[1] == "targets":
+        write_targets(sys.argv[2:])
+    elif sys.argv[1] == "route":
+        route(sys.argv[2], sys.argv[3], sys.argv[4:])
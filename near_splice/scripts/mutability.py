@@ -0,0 +1,65 @@
+"""
+This script encodes trinucleotide contexts and SNVs as small integers, for
+looking up mutability scores (forSanger_1KG_mutation_rate_table.txt).
+
+Each base is encoded with 2 bits (A=0, C=1, G=2, T=3), so a trinucleotide
+context is a code from 0 to 63. A mutation is encoded as context * 4 + alt,
+a code from 0 to 255, of which the 192 codes with alt != the middle base are
+valid SNVs. The mutation rate table is loaded as a dense array indexed by this
+code, so mutabilities are assigned with a single fancy-index.
+
+Contexts with bases other than upper case A, C, G, or T are invalid, and have
+no mutability (NaN), as they have no entry in the mutation rate table.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+
+invalid = 255
+
+base_codes = np.full(256, invalid, dtype=np.uint8)
+for i, base in enumerate("ACGT"):
+    base_codes[ord(base)] = i
+
+def encode(seqs, k=3):
+    """ Encode sequences of length k as integer codes (2 bits per base).
+    Sequences with any other base, or of any other length, get the code 255.
+    """
+    seqs = pd.Series(seqs)
+    valid = seqs.str.len().to_numpy() == k
+
+    raw = np.asarray(seqs.where(valid, "").to_numpy(), dtype=f"S{k}")
+    codes = base_codes[raw.view(np.uint8).reshape(-1, k)].astype(np.uint16)
+
+    valid &= (codes != invalid).all(axis=1)
+    weights = 4 ** np.arange(k - 1, -1, -1)
+    codes = (codes * weights).sum(axis=1)
+
+    return np.where(valid, codes, invalid).astype(np.uint8)
+
+def mutation_codes(context, alt):
+    """ Encode SNVs (trinucleotide context and alternate allele) as a
+    mutation class code from 0 to 255, or -1 if invalid.
+    """
+    ctx = encode(context, k=3).astype(np.int16)
+    alt = encode(alt, k=1).astype(np.int16)
+
+    codes = ctx * 4 + alt
+    codes[(ctx == invalid) | (alt == invalid)] = -1
+
+    return codes
+
+def load_rates(path="../data/forSanger_1KG_mutation_rate_table.txt"):
+    """ Load the mutation rate table as a dense array indexed by mutation code.
+    The last element is NaN, so that invalid codes (-1) have no mutability.
+    """
+    mu_snp = pd.read_csv(path, sep=" ")
+
+    codes = mutation_codes(mu_snp["from"], mu_snp["to"].str.slice(1,2))
+
+    rates = np.full(257, np.nan)
+    rates[codes] = mu_snp.mu_snp.to_numpy()
+    rates[-1] = np.nan
+
+    return rates
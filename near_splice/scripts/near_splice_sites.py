@@ -11,6 +11,8 @@ Features on chrX and chrY are not included.
 # Import the relevant modules
 import numpy as np
 import pandas as pd
+import annotation_cache
+import gtf_attributes as ga
 
 c = "category" # We often convert dtypes to categories below
 
@@ -31,15 +33,25 @@ def main():
     return df
 
 def load_data(data="../outputs/coding_exons.tsv"):
-    """ Read the filtered GENCODE exons into memory
+    """ Read the filtered GENCODE exons into memory.
+    The parsed exons are cached, keyed by the checksum of the input file.
     """
-    df = pd.read_csv(
+    usecols = ["chrom", "start", "end", "strand", "attr"]
+
+    read = lambda: pd.read_csv(
         data,
         sep="\t",
-        usecols=["chrom", "start", "end", "strand", "attr"],
+        usecols=usecols,
         dtype = {"chrom":c, "strand":c}
         )
 
+    df = annotation_cache.cached(
+        read,
+        source=data,
+        settings={"usecols":usecols},
+        name="load_data"
+        )
+
     return df
 
 def autosomes_only(df):
@@ -53,12 +65,12 @@ def autosomes_only(df):
 def extract_attributes(df):
     """ Extract relevant identifiers from the attributes column
     """
-    attr = df.attr.str.split("; ", expand=True).iloc[:,:11]
+    attr = ga.parse_attributes(df.attr, ["gene_id", "transcript_id", "exon_id", "exon_number"])
 
-    ensg = attr[0].str.slice(9, -1).rename("ensg") # gene
-    enst = attr[1].str.slice(15, -1).rename("enst") # transcript
-    ense = attr[7].str.slice(9, -1).rename("ense") # exon
-    exon_number = attr[6].str.slice(12).astype(int).rename("exon_number")
+    ensg = attr.gene_id.rename("ensg") # gene
+    enst = attr.transcript_id.rename("enst") # transcript
+    ense = attr.exon_id.rename("ense") # exon
+    exon_number = attr.exon_number.astype(int).rename("exon_number")
 
     # Merge the attributes back into the original dataframe
     df = pd.concat([df, ensg, enst, ense, exon_number], axis=1)\
@@ -104,26 +116,42 @@ def splice_junctions(df):
 
     return df
 
-def splice_positions(df):
+def splice_positions(df, acceptor=(-25, 10), donor=(-10, 10)):
     """ Annotate the near-splice positions genome-wide.
+    The acceptor and donor windows give the first and last "site" (distance
+    from the splice junction) to annotate in each region.
     """
-    # Find the "site" for each position (its distance from the splice junction)
-    a_sites = pd.Series([list(range(-25,11))]*len(df)) # acceptors
-    d_sites = pd.Series([list(range(-10,11))]*len(df)) # donors
+    for region, window in {"acceptor": acceptor, "donor": donor}.items():
+        if window[0] > window[1]:
+            raise ValueError(f"The {region} window {window} ends before it starts")
+
+    # Identical exons in multiple transcripts share the same splice junctions.
+    # Expand each junction only once.
+    df = df[["chrom", "pos", "strand", "region"]].drop_duplicates()
+    df["region"] = pd.Categorical(df.region, ["acceptor", "donor"])
+
+    windows = {
+        "acceptor": np.arange(acceptor[0], acceptor[1] + 1, dtype=np.int32),
+        "donor": np.arange(donor[0], donor[1] + 1, dtype=np.int32),
+        }
 
-    df.loc[df.region=="acceptor", "site"] = a_sites
-    df.loc[df.region=="donor", "site"] = d_sites
+    # Repeat each junction once per site, and tile the sites across junctions
+    expanded = []
+    for region, sites in windows.items():
+        junctions = df[df.region == region]
+        n, k = len(junctions), len(sites)
 
-    df = df.explode("site", ignore_index=True)
+        x = junctions.iloc[np.repeat(np.arange(n), k)].reset_index(drop=True)
+        x["site"] = np.tile(sites, n)
 
-    df = df.astype({"ensg":c, "enst":c, "ense":c, "region":c, "site":int})
+        # The splicing "site" is dictated by the strand of the transcript
+        sign = np.where(x.strand == "-", -1, 1).astype(np.int32)
+        x["pos"] = x.pos.to_numpy(np.int32) + sign * x.site.to_numpy(np.int32)
 
-    # The splicing "site" is dictated by the strand of the transcript
-    df.loc[df.strand == "+", "pos"] = df.pos + df.site
-    df.loc[df.strand == "-", "pos"] = df.pos - df.site
+        expanded.append(x)
 
-    # Drop unnecessary columns
-    df = df[["chrom", "pos", "strand", "region", "site"]]
+    df = pd.concat(expanded, ignore_index=True)\
+        .sort_values(["chrom", "pos"], ignore_index=True)
 
     # Drop any splice positions with ambiguous annotation, and drop duplicates
     print("Dropping ambiguous positions.")
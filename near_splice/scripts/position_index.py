@@ -0,0 +1,239 @@
+"""
+This script builds sorted, per-chromosome indexes of the positions of interest
+(near-splice, coding, or branchpoint positions), with parallel arrays of
+labels for each position (e.g. region, site, strand, score).
+
+Lookups are vectorized with np.searchsorted, so annotating a large variant
+table with its position labels does not need a pandas merge.
+
+Each index is saved as a directory of .npy files, which are opened as
+memory-mapped arrays. Several processes can therefore share one copy of an
+index in memory.
+
+Usage (from a scripts directory):
+    python3 position_index.py near_splice coding
+    python3 ../../near_splice/scripts/position_index.py branch
+"""
+
+# Import the relevant modules
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import coding_sites as cs
+
+class PositionIndex:
+    """ Sorted int32 positions per chromosome, with parallel label arrays.
+    Categorical labels are stored as integer codes, with their categories
+    kept in self.categories.
+    """
+    def __init__(self, positions, labels, categories):
+        self.positions = positions # {chrom: positions}
+        self.labels = labels # {chrom: {label: values}}
+        self.categories = categories # {label: categories}
+
+    @classmethod
+    def from_frame(cls, df, labels=()):
+        """ Build an index from a dataframe with chrom, pos and label columns.
+        Each (chrom, pos) should appear only once.
+        """
+        df = df.drop_duplicates(["chrom", "pos"])\
+            .sort_values(["chrom", "pos"])
+
+        categories = {}
+        for label in labels:
+            if not pd.api.types.is_numeric_dtype(df[label]):
+                df[label] = df[label].astype("category")
+                categories[label] = df[label].cat.categories.astype(str).tolist()
+                df[label] = df[label].cat.codes
+
+        positions, values = {}, {}
+        for chrom, x in df.groupby("chrom", observed=True, sort=False):
+            chrom = str(chrom)
+            positions[chrom] = x.pos.to_numpy(np.int32)
+            values[chrom] = {label: x[label].to_numpy() for label in labels}
+
+        return cls(positions, values, categories)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """ Open a saved index. Arrays are memory-mapped by default.
+        """
+        with open(os.path.join(path, "index.json")) as f:
+            meta = json.load(f)
+
+        load = lambda name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+
+        positions, labels = {}, {}
+        for chrom in meta["chroms"]:
+            positions[chrom] = load(f"{chrom}.pos")
+            labels[chrom] = {label: load(f"{chrom}.{label}") for label in meta["labels"]}
+
+        return cls(positions, labels, meta["categories"])
+
+    def save(self, path):
+        """ Save the index as a directory of .npy files.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        for chrom, pos in self.positions.items():
+            np.save(os.path.join(path, f"{chrom}.pos.npy"), pos)
+            for label, values in self.labels[chrom].items():
+                np.save(os.path.join(path, f"{chrom}.{label}.npy"), values)
+
+        meta = {
+            "chroms": list(self.positions),
+            "labels": self.label_names(),
+            "categories": self.categories,
+            }
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump(meta, f, indent=1)
+
+    def label_names(self):
+        """ Get the names of the labels in the index.
+        """
+        chrom = next(iter(self.labels), None)
+        return list(self.labels[chrom]) if chrom else []
+
+    def __len__(self):
+        return sum(len(x) for x in self.positions.values())
+
+    def find(self, chrom, pos):
+        """ Find positions on one chromosome.
+        Returns a boolean array (is each position in the index?) and the
+        index of each position within the chromosome's arrays.
+        """
+        index = self.positions.get(chrom)
+        if index is None or len(index) == 0:
+            return np.zeros(len(pos), dtype=bool), np.zeros(len(pos), dtype=np.int64)
+
+        i = np.searchsorted(index, pos)
+        i[i == len(index)] = 0
+        found = index[i] == pos
+
+        return found, i
+
+    def contains(self, chrom, pos):
+        """ Batched membership test for (chrom, pos) arrays.
+        """
+        chrom_codes, chroms = pd.factorize(np.asarray(chrom))
+        pos = np.asarray(pos)
+
+        found = np.zeros(len(pos), dtype=bool)
+        for code, c in enumerate(chroms):
+            rows = np.flatnonzero(chrom_codes == code)
+            found[rows] = self.find(c, pos[rows])[0]
+
+        return found
+
+    def chrom_frame(self, chrom, labels=None):
+        """ Get the positions and labels of one chromosome as a dataframe.
+        """
+        labels = self.label_names() if labels is None else labels
+
+        df = pd.DataFrame({"chrom": chrom, "pos": self.positions[chrom]})
+        for label in labels:
+            x = np.asarray(self.labels[chrom][label])
+            if label in self.categories:
+                x = pd.Categorical.from_codes(x, self.categories[label])
+            df[label] = x
+
+        return df
+
+    def annotate(self, df, labels=None):
+        """ Keep the rows of df whose (chrom, pos) is in the index, and add the
+        labels of each position as new columns. Equivalent to an inner merge
+        on (chrom, pos), but df's row order is kept.
+        """
+        labels = self.label_names() if labels is None else labels
+
+        chrom_codes, chroms = pd.factorize(df.chrom.to_numpy())
+        pos = df.pos.to_numpy()
+
+        found = np.zeros(len(df), dtype=bool)
+
+        # Keep the stored dtype of each label, even if no position is found
+        stored = next(iter(self.labels.values()), {})
+        values = {label: np.zeros(len(df), dtype=stored[label].dtype) for label in labels}
+
+        for code, c in enumerate(chroms):
+            if c not in self.positions:
+                continue
+
+            rows = np.flatnonzero(chrom_codes == code)
+            hit, i = self.find(c, pos[rows])
+            rows, i = rows[hit], i[hit]
+            found[rows] = True
+
+            for label in labels:
+                values[label][rows] = self.labels[c][label][i]
+
+        df = df[found].copy()
+        for label in labels:
+            x = values[label][found]
+            if label in self.categories:
+                x = pd.Categorical.from_codes(x, self.categories[label])
+            df[label] = x
+
+        return df
+
+def near_splice_index(path="../outputs/near_splice_positions.tsv"):
+    """ Index the near-splice positions.
+    """
+    df = pd.read_csv(path, sep="\t")
+    df["site"] = df.site.astype(np.int32)
+
+    return PositionIndex.from_frame(df, ["region", "site", "strand"])
+
+def coding_index(path="../outputs/coding_intervals.tsv"):
+    """ Index the coding positions, from the merged coding intervals.
+    """
+    df = pd.read_csv(path, sep="\t")
+
+    positions = {}
+    for chrom, pos in cs.iter_positions(df):
+        positions.setdefault(chrom, []).append(pos)
+
+    positions = {chrom: np.concatenate(x) for chrom, x in positions.items()}
+    labels = {chrom: {} for chrom in positions}
+
+    return PositionIndex(positions, labels, {})
+
+def branch_index(path="../outputs/branchpoints.bed"):
+    """ Index the positions near branchpoints.
+    """
+    df = pd.read_csv(
+        path,
+        sep="\t",
+        header=None,
+        names=["chrom","start","end","site","score","strand"]
+        )
+    df["pos"] = df.end - 1
+    df["site"] = df.site.astype(np.int32)
+    df["score"] = df.score.astype(np.float32)
+
+    return PositionIndex.from_frame(df, ["site", "score", "strand"])
+
+builders = {
+    "near_splice": near_splice_index,
+    "coding": coding_index,
+    "branch": branch_index,
+    }
+
+def index_path(name, outputs="../outputs"):
+    """ Get the directory of a saved index.
+    """
+    return os.path.join(outputs, "position_index", name)
+
+def load(name, outputs="../outputs"):
+    """ Open a saved index, memory-mapped.
+    """
+    return PositionIndex.load(index_path(name, outputs))
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or ["near_splice", "coding"]:
+        print(f"Indexing {name} positions.")
+        index = builders[name]()
+        index.save(index_path(name))
+        print(f"{len(index)} {name} positions indexed.")
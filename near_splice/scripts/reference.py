@@ -0,0 +1,97 @@
+"""
+This script reads sequence from a .fai-indexed reference FASTA.
+
+The FASTA is memory-mapped, so sequence is read straight from the page cache
+without parsing the file. Sequence contexts for many positions are fetched
+with one contiguous slice per run of nearby positions (e.g. per splice window),
+rather than one read per position.
+
+Bases are returned as they appear in the FASTA (soft-masked bases are not
+converted to upper case), as with bedtools getfasta.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+
+grch38 = "/public_data_resources/reference/GRCh38/GCA_000001405.15_GRCh38_no_alt_analysis_set.fna"
+
+class Reference:
+    """ A memory-mapped, .fai-indexed FASTA file.
+    """
+    def __init__(self, fasta=grch38, fai=None):
+        self.fai = pd.read_csv(
+            fai or fasta + ".fai",
+            sep="\t",
+            header=None,
+            names=["chrom","length","offset","linebases","linewidth"],
+            usecols=[0,1,2,3,4],
+            index_col="chrom"
+            )
+        self.data = np.memmap(fasta, dtype=np.uint8, mode="r")
+
+    def file_offset(self, chrom, pos):
+        """ Get the file offset of 0-based positions on a chromosome.
+        """
+        length, offset, linebases, linewidth = self.fai.loc[chrom]
+        return offset + (pos // linebases) * linewidth + pos % linebases
+
+    def fetch(self, chrom, start, end, pad=False):
+        """ Get the sequence of a 0-based, half-open region, as a uint8 array.
+        The region is clipped to the chromosome, or, with pad, the bases
+        beyond either end of the chromosome are N.
+        """
+        length = self.fai.at[chrom, "length"]
+        lo, hi = min(max(start, 0), length), max(min(end, length), 0)
+
+        if hi > lo:
+            raw = self.data[self.file_offset(chrom, lo):self.file_offset(chrom, hi - 1) + 1]
+            seq = raw[(raw != ord("\n")) & (raw != ord("\r"))]
+        else:
+            seq = np.zeros(0, dtype=np.uint8)
+
+        if not pad:
+            return seq
+
+        left = max(min(end, 0) - start, 0)
+        right = max(end - max(start, length), 0)
+
+        return np.concatenate([
+            np.full(left, ord("N"), dtype=np.uint8),
+            seq,
+            np.full(right, ord("N"), dtype=np.uint8),
+            ])
+
+    def contexts(self, chrom, pos, flank=1, max_gap=1000):
+        """ Get the sequence context of 1-based positions on a chromosome.
+        Returns a (len(pos), 2 * flank + 1) uint8 array of bases, centred on
+        each position. Positions closer together than max_gap are fetched
+        with a single slice. Bases beyond the ends of the chromosome are N.
+        """
+        pos = np.asarray(pos, dtype=np.int64) - 1
+        order = np.argsort(pos, kind="mergesort")
+        pos = pos[order]
+
+        width = 2 * flank + 1
+        out = np.empty((len(pos), width), dtype=np.uint8)
+
+        breaks = np.flatnonzero(np.diff(pos) > max_gap) + 1
+        for run in np.split(np.arange(len(pos)), breaks):
+            if len(run) == 0:
+                continue
+
+            start = pos[run[0]] - flank
+            seq = self.fetch(chrom, start, pos[run[-1]] + flank + 1, pad=True)
+            out[run] = seq[(pos[run] - flank - start)[:,None] + np.arange(width)]
+
+        # Restore the input order
+        contexts = np.empty_like(out)
+        contexts[order] = out
+
+        return contexts
+
+def to_strings(contexts):
+    """ Convert an array of contexts (one row per context) to strings.
+    """
+    contexts = np.ascontiguousarray(contexts)
+    return contexts.view(f"S{contexts.shape[1]}").ravel().astype(str)
@@ -5,30 +5,35 @@
 ## Reformat and annotate the GENCODE .gtf
 python3 exon_filter.py # Filters exons from GENCODE
 python3 near_splice_sites.py # Annotates near-splice positions
-python3 coding_sites.py # Annotates coding positions
-python3 positions_to_bed.py # Converts the above outputs to .bed format
+python3 coding_sites.py # Annotates coding positions (as merged intervals)
+python3 position_index.py near_splice coding # Index the positions of interest
 
 ## phyloP
+python3 score_store.py near_splice coding # Store phyloP scores for the indexed positions
 python3 phylop.py # Get phylop scores for every near-splice position
 
 ## SpliceAI
 # NB sequences are annotated against the + strand, because downstream all
 # variants in VCFs are + stranded.
-bash get_fasta.sh # Get sequence contexts with bedtools
-# The below script is memory intensive, using ~36GB memory & takes ~10 mins to
-# run
-python3 all_possible_variants_to_vcf.py # Annotate all possible SNVs
-bash index_all_snv_vcfs.sh # Index VCFs with tabix
-# The next script takes ~30 mins to run.
-bash extract_spliceai_scores.sh # Extract pre-computed SpliceAI scores.
-python3 spliceai_stats.py # Get summary stats for the SpliceAI scores
+python3 get_contexts.py near_splice coding # Get sequence contexts from the reference FASTA
+# The below script streams the contexts in chunks, so runs in a standard job slot
+python3 all_possible_variants_to_vcf.py # Annotate all possible SNVs (bgzipped and indexed)
+python3 spliceai_store.py # Convert the SpliceAI VCF to a columnar store (once)
+python3 spliceai_stats.py # Look up SpliceAI scores, and get summary stats
 
 ## MAPS
 python3 unaffected_parents.py # Identify unaffected parents
-python3 positions_for_bcftools.py # Get tab-separated positions file
 # The command below took ~3 days to run (large array job to HPC)
 # The wrapper script waits for the array job to complete before proceeding
+# Near-splice, coding and branchpoint SNVs are extracted together, so the
+# branchpoint position index must be built first (see branchpoints/run_all.sh)
 bash extract_parent_snvs_wrapper.sh # Run the "wrapper" script
+# The VEP steps below are optional: coding_consequences.py annotates every
+# possible coding SNV from GENCODE and the reference instead. To use it, run
+# the tidy and MAPS scripts with "gencode".
+# python3 coding_consequences.py
+# python3 tidy_near_splice_and_coding_snvs.py gencode
+# python3 MAPS.py gencode
 bash vep_directories.sh # Empty the VEP input/output directories
 python3 vep_input_format.py # Reformat the coding SNVs to VCF format
 bash vep_wrapper.sh # Send the VEP script to an array job
@@ -0,0 +1,236 @@
+"""
+This script runs array job scripts (e.g. extract_parent_snvs.sh, vep_snvs.sh)
+on a scheduler backend, and waits for them to finish.
+
+- lsf (default): submits the script with bsub as an array job, and waits for
+  it to end with bwait, as before.
+- local: runs each shard of the array as a local process (bash SCRIPT), with
+  LSB_JOBINDEX and LSB_JOBID set as LSF would. A fixed number of workers take
+  the next shard from a shared queue as soon as they are free, so long shards
+  do not hold up the rest. Failed shards are retried. Each shard's memory
+  request (#BSUB -M, in MB) is reserved before it starts, and shards wait
+  until the reservation fits within the memory limit. Output and error logs
+  go to the #BSUB -o / -e paths of the script.
+
+The backend is set with --backend, or the SCHEDULER environment variable, so
+the same wrapper scripts run on the HPC or on a single large workstation.
+
+Usage (from a scripts directory):
+    python3 scheduler.py [--backend local] [--name NAME] SCRIPT [ARRAY]
+        ARRAY is an LSF array spec (e.g. 1-10,12). Without it, the script is
+        run as a single (non-array) job.
+    SCHEDULER=local python3 scheduler.py --processes 8 extract_parent_snvs.sh 1-200
+"""
+
+# Import the relevant modules
+import abc
+import argparse
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+
+def parse_array(spec):
+    """ Expand an LSF array spec (e.g. 1-10,12) into job indices.
+    """
+    indices = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        indices.extend(range(int(start), int(end or start) + 1))
+
+    return indices
+
+def format_array(indices):
+    """ Format sorted job indices as an LSF array spec, e.g. 1-10,12
+    """
+    ranges = []
+    for i in indices:
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def read_directives(script):
+    """ Read the #BSUB directives of a job script, e.g. {"-J": "vep_snvs[1-22]"}.
+    """
+    directives = {}
+    with open(script) as f:
+        for line in f:
+            match = re.match(r"#BSUB\s+(-\w+)\s+(.*)", line.strip())
+            if match:
+                directives[match.group(1)] = match.group(2).strip().strip('"')
+
+    return directives
+
+def job_name(script):
+    """ Get the job name of a script, without its array spec.
+    """
+    name = read_directives(script).get("-J", os.path.basename(script))
+    return name.split("[")[0]
+
+class Scheduler(abc.ABC):
+    """ Runs an array job script and waits for every shard to end.
+    Returns the indices of shards which failed (where the backend knows).
+    """
+    @abc.abstractmethod
+    def run(self, script, indices=None, name=None):
+        pass
+
+class LsfScheduler(Scheduler):
+    """ Submits array jobs to LSF with bsub, and waits with bwait.
+    Failed shards are found from their outputs by the caller (e.g. with
+    snv_manifest.py), so none are returned here.
+    """
+    def run(self, script, indices=None, name=None):
+        name = name or job_name(script)
+        spec = f"{name}[{format_array(indices)}]" if indices else name
+
+        with open(script) as f:
+            subprocess.run(["bsub", "-J", spec], stdin=f, check=True)
+        subprocess.run(["bwait", "-w", f"ended({name})"], check=True)
+
+        return []
+
+class LocalScheduler(Scheduler):
+    """ Runs the shards of an array job as local processes.
+    """
+    def __init__(self, processes=4, retries=2, memory=None):
+        self.processes = processes
+        self.retries = retries
+        self.memory = memory or total_memory() # MB
+        self.reserved = 0
+        self.condition = threading.Condition()
+
+    def reserve(self, mem):
+        """ Wait until a shard's memory request fits, then reserve it.
+        A shard which asks for more than the limit runs on its own.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.reserved + mem <= self.memory or self.reserved == 0)
+            self.reserved += mem
+
+    def release(self, mem):
+        with self.condition:
+            self.reserved -= mem
+            self.condition.notify_all()
+
+    def run_shard(self, script, index, directives):
+        """ Run one shard, with its logs written as LSF would (creating their
+        directories if needed).
+        """
+        env = dict(os.environ, LSB_JOBID=str(os.getpid()), LSB_JOBINDEX=str(index))
+        log = lambda path: path.replace("%J", env["LSB_JOBID"]).replace("%I", str(index))
+
+        out = log(directives.get("-o", os.devnull))
+        err = log(directives.get("-e", os.devnull))
+
+        for path in (out, err):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(out, "w") as stdout, open(err, "w") as stderr:
+            return subprocess.run(["bash", script], env=env, stdout=stdout, stderr=stderr).returncode
+
+    def worker(self, script, shards, failed, directives, mem):
+        """ Take shards from the queue until it is empty, retrying failures.
+        A shard which cannot be run (e.g. its log cannot be opened) fails as
+        if it had a non-zero exit.
+        """
+        while True:
+            try:
+                index, attempt = shards.get_nowait()
+            except queue.Empty:
+                return
+
+            self.reserve(mem)
+            try:
+                returncode = self.run_shard(script, index, directives)
+                reason = f"exit {returncode}"
+            except Exception as e:
+                returncode = None
+                reason = f"{type(e).__name__}: {e}"
+            finally:
+                self.release(mem)
+
+            if returncode == 0:
+                continue
+
+            if attempt < self.retries:
+                print(f"Shard {index} failed ({reason}), retrying.", file=sys.stderr)
+                shards.put((index, attempt + 1))
+            else:
+                print(f"Shard {index} failed ({reason}).", file=sys.stderr)
+                failed.append(index)
+
+    def run(self, script, indices=None, name=None):
+        directives = read_directives(script)
+        mem = int(directives.get("-M", 0))
+
+        shards = queue.Queue()
+        for index in indices or [0]:
+            shards.put((index, 0))
+
+        failed = []
+        workers = [
+            threading.Thread(target=self.worker, args=(script, shards, failed, directives, mem))
+            for _ in range(self.processes)
+            ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        return sorted(failed)
+
+def total_memory():
+    """ Get the total physical memory, in MB.
+    """
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+
+backends = {
+    "lsf": LsfScheduler,
+    "local": LocalScheduler,
+    }
+
+def get_scheduler(backend=None, **kwargs):
+    """ Get a scheduler by name (default: the SCHEDULER environment variable,
+    or lsf).
+    """
+    backend = backend or os.environ.get("SCHEDULER", "lsf")
+
+    if backend not in backends:
+        raise ValueError(
+            f"Unknown scheduler backend: {backend!r} (choose from {', '.join(backends)})")
+
+    if backend == "local":
+        return LocalScheduler(**kwargs)
+
+    return backends[backend]()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=list(backends))
+    parser.add_argument("--name")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--memory", type=int, help="Memory limit (MB) for local shards")
+    parser.add_argument("script")
+    parser.add_argument("array", nargs="?")
+    args = parser.parse_args()
+
+    scheduler = get_scheduler(
+        args.backend,
+        processes=args.processes,
+        retries=args.retries,
+        memory=args.memory
+        )
+    indices = parse_array(args.array) if args.array else None
+
+    failed = scheduler.run(args.script, indices, args.name)
+    if failed:
+        sys.exit(f"{args.script}: shards {format_array(failed)} failed.")
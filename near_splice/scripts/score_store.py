@@ -0,0 +1,127 @@
+"""
+This script builds on-disk stores of per-base scores (e.g. phyloP) for the
+positions in a position index (see position_index.py).
+
+Scores are extracted from the bigWig once, and saved as one float32 .npy file
+per chromosome, aligned to the index's positions. Stores are opened as
+memory-mapped arrays, so later stages (e.g. summary statistics, or annotating
+DNMs) read scores without going back to the bigWig.
+
+Each store records the number of positions per chromosome, and a checksum of
+the positions, of the index it was built from (in store.json). If the index
+has been rebuilt since, loading the store fails, and it must be rebuilt too.
+
+Usage (from a scripts directory):
+    python3 score_store.py near_splice coding
+    python3 ../../near_splice/scripts/score_store.py branch
+"""
+
+# Import the relevant modules
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import bigwig_scores as bws
+import position_index as pi
+
+bigwigs = {
+    "phylop": bws.phylop,
+    }
+
+def store_path(index, score="phylop", outputs="../outputs"):
+    """ Get the directory of a saved score store.
+    """
+    return os.path.join(pi.index_path(index, outputs), score)
+
+def fingerprint(index):
+    """ Get the number of positions per chromosome of an index, and an md5
+    checksum of its positions.
+    """
+    md5 = hashlib.md5()
+    for chrom, pos in index.positions.items():
+        md5.update(chrom.encode())
+        md5.update(np.ascontiguousarray(pos, dtype=np.int32).tobytes())
+
+    return {
+        "lengths": {chrom: len(pos) for chrom, pos in index.positions.items()},
+        "checksum": md5.hexdigest(),
+        }
+
+class ScoreStore:
+    """ Scores for the positions in a position index, per chromosome.
+    """
+    def __init__(self, index, scores):
+        self.index = index # PositionIndex
+        self.scores = scores # {chrom: float32 scores, aligned to index.positions}
+
+    @classmethod
+    def load(cls, index, score="phylop", outputs="../outputs"):
+        """ Open a saved score store, memory-mapped. Raises a ValueError if
+        the index has changed since the store was built.
+        """
+        name, path = index, store_path(index, score, outputs)
+        index = pi.load(index, outputs)
+
+        meta_path = os.path.join(path, "store.json")
+        if not os.path.exists(meta_path):
+            raise ValueError(f"{path} has no store.json; rebuild it with score_store.py {name}")
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        if meta != fingerprint(index):
+            raise ValueError(
+                f"The {name} index has changed since {path} was built; "
+                f"rebuild it with score_store.py {name}")
+
+        scores = {
+            chrom: np.load(os.path.join(path, f"{chrom}.npy"), mmap_mode="r")
+            for chrom in index.positions
+            }
+
+        return cls(index, scores)
+
+    def lookup(self, chrom, pos):
+        """ Get the score of each (chrom, pos) pair, as a float32 array.
+        Positions not in the index are NaN.
+        """
+        chrom_codes, chroms = pd.factorize(np.asarray(chrom))
+        pos = np.asarray(pos)
+
+        out = np.full(len(pos), np.nan, dtype=np.float32)
+        for code, c in enumerate(chroms):
+            if c not in self.scores:
+                continue
+
+            rows = np.flatnonzero(chrom_codes == code)
+            hit, i = self.index.find(c, pos[rows])
+            out[rows[hit]] = self.scores[c][i[hit]]
+
+        return out
+
+def build(index, score="phylop", outputs="../outputs", processes=8):
+    """ Extract the scores of every position in an index, and save them.
+    """
+    path = store_path(index, score, outputs)
+    os.makedirs(path, exist_ok=True)
+
+    index = pi.load(index, outputs)
+
+    for chrom, scores in bws.iter_chrom_scores(index.positions, bigwigs[score], processes):
+        np.save(os.path.join(path, f"{chrom}.npy"), scores)
+
+    # Written last, so that an unfinished store does not load
+    with open(os.path.join(path, "store.json"), "w") as f:
+        json.dump(fingerprint(index), f, indent=1)
+
+def load(index, score="phylop", outputs="../outputs"):
+    """ Open a saved score store, memory-mapped.
+    """
+    return ScoreStore.load(index, score, outputs)
+
+if __name__ == "__main__":
+    for index in sys.argv[1:] or ["near_splice", "coding"]:
+        print(f"Storing phyloP scores for {index} positions.")
+        build(index)
@@ -0,0 +1,102 @@
+"""
+This script calculates summary statistics of per-position scores (e.g. the
+maximum SpliceAI DS_any of any SNV at a position, or phyloP) by site, from
+position-sorted chunks of data, without holding all of the data in memory.
+
+- position_max takes the maximum score at each position with a segmented
+  reduction (np.fmax.reduceat). The last position of each chunk is carried
+  over to the next chunk, in case it continues there.
+- SiteStats keeps running moments (count, mean, sum of squared deviations) for
+  each site, merging the moments of each chunk as in Welford's / Chan's
+  parallel algorithm. It gives the same count, mean, std, sem and 95% CI as
+  pandas' groupby aggregation.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+
+def segment_max(df, starts, value, keys, labels):
+    """ Get the maximum value of each segment of rows (NaNs are ignored).
+    """
+    out = df.iloc[starts][keys + labels].reset_index(drop=True)
+    out[value] = np.fmax.reduceat(df[value].to_numpy(), starts)
+
+    return out
+
+def position_max(chunks, value, labels=(), keys=("chrom","pos")):
+    """ Get the maximum value at each position, from an iterable of dataframes
+    sorted by keys. Yields one dataframe (one row per position) per chunk.
+    Labels should be constant at each position.
+    """
+    labels, keys = list(labels), list(keys)
+    carry = None
+
+    for df in chunks:
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+
+        if len(df) == 0:
+            continue
+
+        new = np.zeros(len(df), dtype=bool)
+        new[0] = True
+        for key in keys:
+            x = df[key].to_numpy()
+            new[1:] |= x[1:] != x[:-1]
+        starts = np.flatnonzero(new)
+
+        # The last position may continue in the next chunk
+        carry = df.iloc[starts[-1]:]
+        df, starts = df.iloc[:starts[-1]], starts[:-1]
+
+        if len(df) > 0:
+            yield segment_max(df, starts, value, keys, labels)
+
+    if carry is not None and len(carry) > 0:
+        yield segment_max(carry, np.zeros(1, dtype=np.int64), value, keys, labels)
+
+class SiteStats:
+    """ Running summary statistics of a value, grouped by site.
+    """
+    def __init__(self, by):
+        self.by = by
+        self.moments = None # n, mean, m2 per site
+
+    def update(self, df, value):
+        """ Add a chunk of data to the running moments.
+        """
+        grouped = df.groupby(self.by, observed=True)[value]
+        n = grouped.count()
+        chunk = pd.DataFrame({"n": n, "mean": grouped.mean(), "m2": grouped.var(ddof=0) * n})
+        chunk = chunk[chunk.n > 0]
+
+        if self.moments is None:
+            self.moments = chunk
+            return
+
+        sites = self.moments.index.union(chunk.index)
+        a = self.moments.reindex(sites).fillna(0)
+        b = chunk.reindex(sites).fillna(0)
+
+        n = a.n + b.n
+        delta = b["mean"] - a["mean"]
+
+        self.moments = pd.DataFrame({
+            "n": n,
+            "mean": a["mean"] + delta * b.n / n,
+            "m2": a.m2 + b.m2 + delta ** 2 * a.n * b.n / n,
+            })
+
+    def result(self):
+        """ Get count, mean, std, sem and 95% CIs for each site.
+        """
+        m = self.moments.sort_index()
+
+        stats = pd.DataFrame({"count": m.n.astype(np.int64), "mean": m["mean"]})
+        stats["std"] = np.sqrt(m.m2 / (m.n - 1)).where(m.n > 1)
+        stats["sem"] = stats["std"] / np.sqrt(m.n)
+        stats["ci_upper"] = stats["mean"] + (stats["sem"] * 1.96)
+        stats["ci_lower"] = stats["mean"] - (stats["sem"] * 1.96)
+
+        return stats
@@ -0,0 +1,184 @@
+"""
+This script tracks the per-chunk outputs of the parent SNV extraction array
+jobs (extract_parent_snvs.sh), so that failed or pre-empted chunks can be
+re-run on their own, and the outputs are only concatenated once every chunk
+is verified.
+
+Each job writes its output to a temporary file, moves it into place, and then
+writes an ".ok" marker next to it with the output's row count, size in bytes,
+and MD5 checksum. Rows are lines in text (.tsv) outputs, and fixed-width
+records (see allele_counts.py) in binary (.bin) outputs; a binary output which
+is not a whole number of records has no row count, and fails. A chunk's
+status is:
+- done: the marker matches the output
+- failed: a partial output exists, or the output does not match its marker
+- pending: nothing has been written yet
+The status of every chunk is written to a manifest (.tsv) each time.
+
+If a job plan is given (see job_plan.py), only the chunks in the plan are
+tracked, and the jobs (rather than the chunks) with any chunk not done are
+re-submitted.
+
+Usage (from a scripts directory; outputs are templates with "{}" for the chunk):
+    python3 snv_manifest.py --chunks CHUNKS [--plan PLAN] --manifest MANIFEST pending OUTPUT...
+        Prints an LSF array spec (e.g. 1-10,12) of the chunks (or jobs) not
+        yet done.
+    python3 snv_manifest.py --chunks CHUNKS --manifest MANIFEST concat OUTPUT DEST
+        Verifies the checksum of every chunk, and concatenates them in chunk
+        order. Exits with an error, and writes nothing, if any chunk fails.
+"""
+
+# Import the relevant modules
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import pandas as pd
+import allele_counts as ac
+
+def read_marker(path):
+    """ Read an ".ok" marker: rows, bytes and MD5 checksum of an output.
+    """
+    with open(path) as f:
+        rows, size, md5 = f.read().split()
+
+    return int(rows), int(size), md5
+
+def checksum(path, blocksize=2**20):
+    """ Get the row count and MD5 checksum of an output. A binary output
+    which is not a whole number of records has no row count (None).
+    """
+    binary = path.endswith(".bin")
+    md5 = hashlib.md5()
+    rows = 0
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            md5.update(block)
+            if not binary:
+                rows += block.count(b"\n")
+
+    if binary:
+        size = os.path.getsize(path)
+        rows = size // ac.dtype.itemsize if size % ac.dtype.itemsize == 0 else None
+
+    return rows, md5.hexdigest()
+
+def chunk_status(output, verify=False):
+    """ Get the status of one chunk's output. Only the size is compared to the
+    marker, unless verify is True (then the rows and checksum are too).
+    """
+    if not os.path.exists(output + ".ok"):
+        partial = os.path.exists(output) or os.path.exists(output + ".tmp")
+        return ("failed" if partial else "pending"), None, None
+
+    rows, size, md5 = read_marker(output + ".ok")
+
+    if not os.path.exists(output) or os.path.getsize(output) != size:
+        return "failed", rows, md5
+
+    if verify and checksum(output) != (rows, md5):
+        return "failed", rows, md5
+
+    return "done", rows, md5
+
+def n_chunks(path):
+    """ Count the chunks (one per line of the chunk list).
+    """
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+def read_plan(path):
+    """ Read the job of each chunk from a job plan.
+    """
+    return pd.read_csv(path, sep="\t", usecols=["job","chunk"])
+
+def chunk_numbers(args):
+    """ Get the chunks to track: every chunk, or only those in the plan.
+    """
+    if args.plan:
+        return sorted(read_plan(args.plan).chunk)
+
+    return list(range(1, n_chunks(args.chunks) + 1))
+
+def status(templates, chunks, verify=False):
+    """ Get the status of every chunk's outputs.
+    """
+    records = []
+    for chunk in chunks:
+        for template in templates:
+            output = template.format(chunk)
+            records.append((chunk, output) + chunk_status(output, verify))
+
+    return pd.DataFrame(records, columns=["chunk","output","status","rows","md5"])
+
+def write_manifest(df, path):
+    """ Save the status of every chunk, and summarise it.
+    """
+    df.to_csv(path, sep="\t", index=False)
+
+    counts = df.status.value_counts()
+    print(", ".join(f"{n} {x}" for x, n in counts.items()), file=sys.stderr)
+
+def array_spec(chunks):
+    """ Format sorted chunk numbers as an LSF array spec, e.g. 1-10,12
+    """
+    ranges = []
+    for chunk in chunks:
+        if ranges and chunk == ranges[-1][1] + 1:
+            ranges[-1][1] = chunk
+        else:
+            ranges.append([chunk, chunk])
+
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def pending(args):
+    """ Print the chunks (or jobs) with any output not done.
+    """
+    df = status(args.outputs, chunk_numbers(args))
+    write_manifest(df, args.manifest)
+
+    chunks = df[df.status != "done"].chunk.unique()
+    if args.plan:
+        jobs = read_plan(args.plan)
+        print(array_spec(sorted(jobs[jobs.chunk.isin(chunks)].job.unique())))
+    else:
+        print(array_spec(sorted(chunks)))
+
+def concat(args):
+    """ Concatenate the outputs of every chunk, if all are verified.
+    """
+    df = status([args.output], chunk_numbers(args), verify=True)
+    write_manifest(df, args.manifest)
+
+    if (df.status != "done").any():
+        bad = array_spec(df[df.status != "done"].chunk.tolist())
+        sys.exit(f"Not concatenating {args.output}: chunks {bad} are not verified.")
+
+    with open(args.dest + ".tmp", "wb") as dest:
+        for output in df.output:
+            with open(output, "rb") as f:
+                shutil.copyfileobj(f, dest)
+
+    os.replace(args.dest + ".tmp", args.dest)
+    print(f"Concatenated {len(df)} chunks ({df.rows.sum()} rows) to {args.dest}", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", default="../data/aggV2_vcf_file_paths.tsv")
+    parser.add_argument("--plan")
+    parser.add_argument("--manifest", required=True)
+    commands = parser.add_subparsers(dest="command")
+
+    parser_pending = commands.add_parser("pending")
+    parser_pending.add_argument("outputs", nargs="+")
+    parser_pending.set_defaults(run=pending)
+
+    parser_concat = commands.add_parser("concat")
+    parser_concat.add_argument("output")
+    parser_concat.add_argument("dest")
+    parser_concat.set_defaults(run=concat)
+
+    args = parser.parse_args()
+    args.run(args)
@@ -0,0 +1,82 @@
+"""
+This script annotates all possible SNVs at a set of positions, and writes them
+to VCF. It is shared by the near-splice and branchpoint analyses.
+
+The sequence contexts (get_contexts.py output) are streamed in chunks, so
+peak memory is bounded by the chunksize rather than the number of positions.
+The "chr" and "no_chr_prefix" VCFs are written in the same pass, as
+BGZF-compressed VCFs with tabix indexes (see bgzf.py).
+
+The contexts should be sorted by chromosome and position (as written by
+get_contexts.py), so that the VCF outputs are sorted too.
+"""
+
+# Import the relevant modules
+import numpy as np
+import pandas as pd
+import bgzf
+
+bases = np.array(["A","T","C","G"])
+
+def read_contexts(path, chunksize=1000000):
+    """ Stream the sequence contexts in chunks.
+    Starting format (get_contexts.py output): chr1  926003  TCC
+    """
+    chunks = pd.read_csv(path, sep="\t", na_filter=False, chunksize=chunksize)
+
+    for df in chunks:
+        chrom = df.chrom.to_numpy()
+        pos = df.pos.to_numpy()
+        ref = df.context.str.slice(1,2).to_numpy()
+
+        yield chrom, pos, ref
+
+def all_snvs(chrom, pos, ref):
+    """ Annotate every possible SNV at each position.
+    Each position is repeated once per base, and the base matching the
+    reference allele is masked out.
+    """
+    is_alt = bases[None,:] != ref[:,None].astype(str)
+    n_alts = is_alt.sum(axis=1)
+
+    df = pd.DataFrame({
+        "chrom": np.repeat(chrom, n_alts),
+        "pos": np.repeat(pos, n_alts),
+        "id": ".",
+        "ref": np.repeat(ref, n_alts),
+        "alt": np.broadcast_to(bases, is_alt.shape)[is_alt],
+        "qual": ".",
+        "filter": ".",
+        "info": ".",
+        })
+
+    return df
+
+def write_vcfs(contexts, out_prefix, header="../data/vcf_38_header.txt",
+    chunksize=1000000, threads=4):
+    """ Write all possible SNVs to .vcf.gz, with and without the "chr" prefix.
+    The GRCh38 format usually has a "chr" prefix before the chromosome name.
+    However, the pre-computed GRCh38 SpliceAI scores do not.
+    """
+    header = open(header).read()
+
+    paths = {x: f"{out_prefix}_{x}.vcf.gz" for x in ["chr", "no_chr_prefix"]}
+    outputs = {x: bgzf.VcfWriter(path, threads=threads) for x, path in paths.items()}
+
+    for output in outputs.values():
+        output.write(header)
+
+    n = 0
+    for chunk in read_contexts(contexts, chunksize):
+        df = all_snvs(*chunk)
+        outputs["chr"].write_frame(df)
+
+        df["chrom"] = df.chrom.str.slice(3) # Remove "chr" prefix
+        outputs["no_chr_prefix"].write_frame(df)
+
+        n += len(df)
+
+    for output in outputs.values():
+        output.close()
+
+    print(f"Wrote {n} SNVs to {', '.join(paths.values())}")
@@ -0,0 +1,100 @@
+"""
+This script parses SpliceAI annotations (the INFO field of the pre-computed
+SpliceAI VCFs). It is shared by the near-splice, branchpoint, and candidate
+variant analyses.
+
+SpliceAI INFO format (one "|"-separated annotation per gene, comma-separated):
+    SpliceAI=ALLELE|SYMBOL|DS_AG|DS_AL|DS_DG|DS_DL|DP_AG|DP_AL|DP_DG|DP_DL
+
+All annotations are split into lines of one text buffer and read with pandas'
+C parser in one pass, straight into float32 delta scores (DS) and int16 delta
+positions (DP). Records annotated against several genes take the maximum delta
+score of each type over genes, with the delta position of that gene.
+"""
+
+# Import the relevant modules
+import io
+import numpy as np
+import pandas as pd
+
+fields = ["allele", "symbol", "DS_AG", "DS_AL", "DS_DG", "DS_DL", "DP_AG",
+    "DP_AL", "DP_DG", "DP_DL"]
+ds_cols = fields[2:6]
+dp_cols = fields[6:]
+
+def parse(info):
+    """ Parse SpliceAI INFO strings into delta scores and delta positions.
+    Returns a dataframe with the same index as info, with one column per delta
+    score and delta position, and the number of genes annotated.
+    """
+    info = pd.Series(info)
+
+    if info.str.contains(";", regex=False).any():
+        info = info.str.split(";", n=1).str[0] # Keep the SpliceAI field
+
+    n_genes = info.str.count(",").to_numpy() + 1
+
+    if len(info) == 0:
+        ds = np.empty((0, 4), dtype=np.float32)
+        dp = np.empty((0, 4), dtype=np.int16)
+
+    else:
+        text = "\n".join(info.to_numpy()).replace(",", "\n")
+        annotations = pd.read_csv(
+            io.StringIO(text),
+            sep="|",
+            header=None,
+            names=fields,
+            usecols=ds_cols + dp_cols,
+            dtype={**{x: np.float32 for x in ds_cols}, **{x: np.int16 for x in dp_cols}}
+            )
+        ds = annotations[ds_cols].to_numpy()
+        dp = annotations[dp_cols].to_numpy()
+
+    # Take the maximum over genes, and the delta position of the first gene
+    # with that maximum
+    if len(ds) > len(info):
+        starts = np.concatenate([[0], np.cumsum(n_genes)[:-1]])
+        record = np.repeat(np.arange(len(info)), n_genes)
+
+        ds_max = np.maximum.reduceat(ds, starts, axis=0)
+        first = np.where(ds == ds_max[record], np.arange(len(ds))[:,None], len(ds))
+        first = np.minimum.reduceat(first, starts, axis=0)
+
+        ds, dp = ds_max, dp[first, np.arange(4)]
+
+    scores = pd.DataFrame(ds, columns=ds_cols, index=info.index)
+    for i, col in enumerate(dp_cols):
+        scores[col] = dp[:,i]
+    scores["n_genes"] = n_genes.astype(np.int16)
+
+    return scores
+
+def summarise(df):
+    """ Add the probability of any splicing impact (DS_any), and the maximum
+    delta score (DS_max) and its type (DS_max_type). Variants without delta
+    scores get NaN.
+    """
+    ds = df[ds_cols].to_numpy()
+    scored = ~np.isnan(ds).any(axis=1)
+
+    df["DS_any"] = 1 - np.prod(1 - ds, axis=1) # Probability of any splicing impact
+    df["DS_max"] = ds.max(axis=1) # Maximum predicted splicing impact
+    df["DS_max_type"] = pd.Categorical.from_codes( # Type of maximal splicing impact
+        np.where(scored, np.nan_to_num(ds, nan=-1).argmax(axis=1), -1),
+        ds_cols
+        )
+
+    return df
+
+def tidy(df, column="info"):
+    """ Replace the INFO column of a SpliceAI VCF dataframe with the delta
+    scores and positions, and their summaries (see summarise).
+    """
+    scores = parse(df[column])
+    df = df.drop(column, axis=1)
+
+    for col in ds_cols + dp_cols:
+        df[col] = scores[col].to_numpy()
+
+    return summarise(df)
@@ -7,89 +7,73 @@ near-splice variants.
 import numpy as np
 import pandas as pd
 import os
+import position_index as pi
+import spliceai_store as ss
+import spliceai_info as sai
+import segment_stats as segs
 
 def main():
     """ Runs all the functions in this script
     """
-    in_path = "../outputs/near_splice_spliceai_scores/0000.vcf"
     output = "../outputs/near_splice_spliceai_scores.tsv"
     stats_out = "../stats/near_splice_spliceai.tsv"
 
     if os.path.exists(output) & os.path.exists(stats_out):
-        df = pd.read_csv(output, sep="\t")
+        return
 
-    else:
-        df = load_spliceai_data(in_path)\
-            .pipe(tidy_spliceai)\
-            .pipe(merge_near_splice_positions, path=output)\
-            .pipe(near_splice_spliceai_stats, path=stats_out)
+    chunks = load_spliceai_data("near_splice", path=output)
+    near_splice_spliceai_stats(chunks, path=stats_out)
 
-    return df
-
-def load_spliceai_data(path):
-    """ Read a SpliceAI vcf to memory.
+def load_spliceai_data(index, path):
+    """ Look up the pre-computed SpliceAI scores at every indexed position, one
+    chromosome at a time. Each chromosome's variants are annotated, appended
+    to a temporary file, and yielded. The file is moved to path once every
+    chromosome is done, so an interrupted run leaves no partial output.
     """
-    df = pd.read_csv(
-        path,
-        comment="#",
-        sep="\t",
-        header=None,
-        names=["chrom","pos","id","ref","alt","qual","filter","info"],
-        usecols=["chrom","pos","ref","alt","info"]
-        )
+    index = pi.load(index)
+    store = ss.load()
+    tmp = path + ".tmp"
 
-    return df
-
-def tidy_spliceai(df):
-    """ Tidy the SpliceAI vcf, and get the near-splice annotations for each
-    position.
-    """
-    # Extract delta score (ds) and delta position (dp)
-    scores = [x.split(";")[0] for x in df.iloc[:,-1].copy()]
-    ds =  pd.DataFrame([x.split("|")[2:6] for x in scores]).astype(float)
-    dp =  pd.DataFrame([x.split("|")[6:] for x in scores]).astype(int)
+    with open(tmp, "w") as output:
+        for i, (chrom, pos) in enumerate(index.positions.items()):
+            df = store.at_positions(chrom, pos)\
+                .pipe(tidy_spliceai)\
+                .pipe(merge_near_splice_positions, index=index)
 
-    # Calculate the probability of any splicing impact
-    ds_any = (1-(1-ds).product(axis=1)).rename("DS_any")
+            df.to_csv(output, sep="\t", index=False, header=(i == 0))
 
-    # Tidy data
-    df = pd.concat([df, ds, dp, ds_any], axis=1)\
-        .drop("info", axis=1)
+            yield df
 
-    df.columns = ["chrom", "pos", "ref", "alt", "DS_AG", "DS_AL", "DS_DG",\
-        "DS_DL", "DP_AG", "DP_AL", "DP_DG", "DP_DL", "DS_any"]
+    os.replace(tmp, path)
 
-    df["chrom"] = "chr" + df["chrom"].astype(str) # For merging, next.
+def tidy_spliceai(df):
+    """ Calculate the probability of any splicing impact (see spliceai_info.py).
+    """
+    df = sai.summarise(df).drop(["DS_max","DS_max_type"], axis=1)
 
     return df
 
-def merge_near_splice_positions(df, path):
+def merge_near_splice_positions(df, index):
     """ Retreive near-splice annotations for each variant
     """
-    ns = pd.read_csv("../outputs/near_splice_positions.tsv", sep="\t")
-    df = ns.merge(df)
-    df.to_csv(path, sep="\t", index=False) # Save the entire dataframe
+    df = index.annotate(df)
 
     return df
 
-def near_splice_spliceai_stats(df, path):
+def near_splice_spliceai_stats(chunks, path):
     """ Calculate summary statistics of SpliceAI scores at near-splice positions
+    (see segment_stats.py)
     """
-    # Get the greatest splicing impact of any SNV at a given position.
-    pos_group = df.groupby(["region","site","chrom","pos","ref"])
-    ds_any_max = pos_group.DS_any.max()
+    stats = segs.SiteStats(["region","site"])
 
-    # Calculate summary stats by near-splice position
-    site_group = ds_any_max.groupby(level=["region", "site"])
-    stats = site_group.agg(["count","mean","std","sem"])
-    stats["ci_upper"] = stats["mean"] + (stats["sem"] * 1.96)
-    stats["ci_lower"] = stats["mean"] - (stats["sem"] * 1.96)
+    # Get the greatest splicing impact of any SNV at a given position, and
+    # update the summary stats by near-splice position
+    for df in segs.position_max(chunks, "DS_any", labels=["region","site"]):
+        stats.update(df, "DS_any")
 
     # Write to output
-    stats = stats.reset_index()
+    stats = stats.result().reset_index()
     stats.to_csv(path, sep="\t", index=False)
 
-    return df
-
 if __name__ == "__main__":
-    df = main()
+    main()
@@ -0,0 +1,236 @@
+"""
+This script converts the genome-wide, pre-computed SpliceAI VCF into a compact,
+columnar store, and looks up SpliceAI scores from it. Once the store is built,
+no analysis needs to read the SpliceAI VCF again.
+
+Each chromosome is stored as flat binary arrays, sorted by the variant key
+pos * 4 + alt (with bases encoded as in mutability.py: A=0, C=1, G=2, T=3):
+    key     uint32      pos * 4 + alt
+    ref     uint8       reference base code
+    ds      uint8 x 4   DS_AG, DS_AL, DS_DG, DS_DL (x 100)
+    dp      int8 x 4    DP_AG, DP_AL, DP_DG, DP_DL
+
+SpliceAI delta scores have two decimal places, so are stored exactly as
+integers out of 100. The arrays are opened memory-mapped, and batches of
+variants are found with np.searchsorted on the sorted keys.
+
+Usage (from near_splice/scripts):
+    python3 spliceai_store.py
+"""
+
+# Import the relevant modules
+import io
+import itertools
+import json
+import os
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+import pysam
+import mutability
+import spliceai_info as sai
+
+spliceai = "/public_data_resources/SpliceAI/Predicting_splicing_from_primary_sequence-66029966/genome_scores_v1.3/spliceai_scores.masked.snv.hg38.vcf.gz"
+store_dir = "../../near_splice/outputs/spliceai_store"
+
+bases = np.array(list("ACGT"))
+arrays = {
+    "key": (np.uint32, ()),
+    "ref": (np.uint8, ()),
+    "ds": (np.uint8, (4,)),
+    "dp": (np.int8, (4,)),
+    }
+
+def encode(df):
+    """ Encode parsed SpliceAI records as sorted store arrays.
+    """
+    scores = sai.parse(df["info"])
+    alt = mutability.encode(df.alt, k=1).astype(np.uint32)
+
+    encoded = {
+        "key": df.pos.to_numpy(np.uint32) * 4 + alt,
+        "ref": mutability.encode(df.ref, k=1),
+        "ds": np.round(scores[sai.ds_cols].to_numpy() * 100).astype(np.uint8),
+        "dp": scores[sai.dp_cols].to_numpy().astype(np.int8),
+        }
+
+    order = np.argsort(encoded["key"], kind="mergesort")
+
+    return {name: x[order] for name, x in encoded.items()}
+
+def convert_chrom(args):
+    """ Convert the SpliceAI records of one chromosome, in chunks.
+    The records of the last position in each chunk are carried over to the
+    next chunk, so that every position is sorted in one piece.
+    """
+    contig, path, out, chunksize = args
+
+    tbx = pysam.TabixFile(path)
+    records = tbx.fetch(contig)
+    files = {name: open(os.path.join(out, f"{contig}.{name}.bin"), "wb") for name in arrays}
+
+    n = 0
+    carry = None
+    while True:
+        lines = list(itertools.islice(records, chunksize))
+        if lines:
+            df = pd.read_csv(
+                io.StringIO("\n".join(lines)),
+                sep="\t",
+                header=None,
+                names=["chrom","pos","id","ref","alt","qual","filter","info"],
+                usecols=["pos","ref","alt","info"]
+                )
+            df = pd.concat([carry, df]) if carry is not None else df
+
+            last = df.pos.to_numpy() == df.pos.iloc[-1]
+            carry, df = df[last], df[~last]
+
+        else:
+            df, carry = carry, None
+
+        if df is None:
+            break
+
+        for name, x in encode(df).items():
+            x.tofile(files[name])
+        n += len(df)
+
+    for f in files.values():
+        f.close()
+    tbx.close()
+
+    return contig, n
+
+def build(path=spliceai, out=store_dir, processes=8, chunksize=5000000):
+    """ Convert the SpliceAI VCF, one chromosome per worker process.
+    """
+    os.makedirs(out, exist_ok=True)
+
+    contigs = pysam.TabixFile(path).contigs
+    jobs = [(contig, path, out, chunksize) for contig in contigs]
+
+    with Pool(processes) as pool:
+        counts = dict(pool.imap(convert_chrom, jobs))
+
+    with open(os.path.join(out, "store.json"), "w") as f:
+        json.dump({"source": path, "counts": counts}, f, indent=1)
+
+    print(f"Stored {sum(counts.values())} SpliceAI records in {out}")
+
+def empty():
+    """ Get empty store arrays (for chromosomes with no records).
+    """
+    return {name: np.empty((0,) + shape, dtype=dtype) for name, (dtype, shape) in arrays.items()}
+
+def to_frame(ds, dp):
+    """ Get delta scores (x 100) and delta positions as a dataframe.
+    """
+    df = pd.DataFrame(ds.astype(np.float32) / 100, columns=sai.ds_cols)
+    for i, col in enumerate(sai.dp_cols):
+        df[col] = dp[:,i].astype(np.int16)
+
+    return df
+
+class SpliceAIStore:
+    """ Memory-mapped SpliceAI scores, per chromosome.
+    Chromosomes are named as in the SpliceAI VCF (without the "chr" prefix).
+    """
+    def __init__(self, path=store_dir):
+        with open(os.path.join(path, "store.json")) as f:
+            self.counts = json.load(f)["counts"]
+
+        self.arrays = {}
+        for contig, n in self.counts.items():
+            if n == 0:
+                self.arrays[contig] = empty()
+                continue
+
+            self.arrays[contig] = {
+                name: np.memmap(os.path.join(path, f"{contig}.{name}.bin"),
+                    dtype=dtype, mode="r", shape=(n,) + shape)
+                for name, (dtype, shape) in arrays.items()
+                }
+
+    def contig(self, chrom):
+        """ Get the stored arrays of a chromosome, with or without "chr".
+        """
+        chrom = chrom[3:] if chrom.startswith("chr") else chrom
+        return self.arrays.get(chrom, empty())
+
+    def lookup(self, chrom, pos, ref, alt):
+        """ Get the SpliceAI scores of a batch of SNVs, in the input order.
+        Returns a dataframe of delta scores and positions, and whether each
+        SNV was found in the store (with a matching ref). SNVs which are not
+        found, or have a ref or alt other than A, C, G or T, get NaN delta
+        scores and 0 delta positions.
+        """
+        chrom_codes, chroms = pd.factorize(np.asarray(chrom))
+        alt = mutability.encode(alt, k=1)
+        ref = mutability.encode(ref, k=1)
+        key = np.asarray(pos, dtype=np.int64) * 4 + alt
+
+        # Invalid alleles (encoded as 255) would give the key of another SNV
+        valid = (alt != mutability.invalid) & (ref != mutability.invalid)
+
+        found = np.zeros(len(key), dtype=bool)
+        ds = np.full((len(key), 4), np.nan, dtype=np.float32)
+        dp = np.zeros((len(key), 4), dtype=np.int8)
+
+        for code, c in enumerate(chroms):
+            x = self.contig(c)
+            if len(x["key"]) == 0:
+                continue
+
+            rows = np.flatnonzero((chrom_codes == code) & valid)
+            i = np.searchsorted(x["key"], key[rows])
+            i[i == len(x["key"])] = 0
+            hit = (x["key"][i] == key[rows]) & (x["ref"][i] == ref[rows])
+
+            rows, i = rows[hit], i[hit]
+            found[rows] = True
+            ds[rows] = x["ds"][i]
+            dp[rows] = x["dp"][i]
+
+        df = to_frame(ds, dp)
+        df["found"] = found
+
+        return df
+
+    def at_positions(self, chrom, pos):
+        """ Get every stored SNV at sorted positions on one chromosome, as a
+        dataframe of chrom, pos, ref, alt, and delta scores and positions.
+        """
+        x = self.contig(chrom)
+        pos = np.asarray(pos, dtype=np.int64)
+
+        # Rows of the stored SNVs at each position (up to 3 per position)
+        start = np.searchsorted(x["key"], pos * 4)
+        n = np.searchsorted(x["key"], pos * 4 + 4) - start
+        rows = np.repeat(start - np.cumsum(n) + n, n) + np.arange(n.sum())
+
+        key = np.asarray(x["key"][rows], dtype=np.int64)
+        df = pd.DataFrame({
+            "chrom": chrom,
+            "pos": key // 4,
+            "ref": bases[np.minimum(x["ref"][rows], 3)],
+            "alt": bases[key % 4],
+            })
+
+        return pd.concat([df, to_frame(x["ds"][rows], x["dp"][rows])], axis=1)
+
+    def at_index(self, index):
+        """ Get every stored SNV at the positions of a PositionIndex.
+        """
+        return pd.concat(
+            [self.at_positions(chrom, pos) for chrom, pos in index.positions.items()],
+            ignore_index=True
+            )
+
+def load(path=store_dir):
+    """ Open a saved SpliceAI store, memory-mapped.
+    """
+    return SpliceAIStore(path)
+
+if __name__ == "__main__":
+    build()
@@ -3,71 +3,63 @@ This script collates the near-splice and coding SNVs.
 It gives one definitive consequence to each SNV.
 Variants are labelled as "nonsense", "missense", "synonymous", or a given a
 near-splice annotation.
+
+Coding consequences come from VEP (the VEP cache, see vep_cache.py) by
+default, or from the in-process annotator (coding_consequences.py), with:
+    python3 tidy_near_splice_and_coding_snvs.py gencode
+The output is named by the consequence source (see output_path), so outputs
+from each source are kept apart.
 """
 
 # Import the relevant modules
 import numpy as np
 import pandas as pd
 import os
+import sys
+import position_index as pi
+import allele_counts as ac
+import vep_cache as vc
+import coding_consequences as cc
+
+def output_path(csq_source="vep"):
+    """ Get the path of the collated SNVs, for a source of coding consequences.
+    """
+    suffix = "" if csq_source == "vep" else f"_{csq_source}"
+    return f"../outputs/unaff_parents_allele_counts{suffix}.tsv"
 
 def read_allele_counts(region):
-    """ Read the allele counts for SNVs in the unaffected parents.
+    """ Read the allele counts for SNVs in the unaffected parents, in the
+    compact or verbose format (see allele_counts.py).
     """
 
-    names = ["chrom", "pos", "ref", "alt", "filter", "an", "ac", "sample"]
-
-    df = pd.read_csv(
-        f"../outputs/unaff_parents_{region}_snvs.tsv",
-        sep="\t",
-        header=None,
-        names=names,
-        usecols=["chrom", "pos", "ref", "alt", "ac"]
-        )\
+    df = ac.read(f"../outputs/unaff_parents_{region}_snvs")\
         .drop_duplicates(subset=["chrom", "pos", "ref", "alt"], keep=False)
 
     return df
 
-def read_coding_csqs():
-    """ Get the VEP consequence annotations for each coding variant
+def read_coding_csqs(df, source="vep"):
+    """ Get the consequence annotations for each coding variant, from the
+    VEP cache (see vep_cache.py) or the in-process annotator (see
+    coding_consequences.py).
     """
 
-    names = (["variant", "a", "b", "ensg", "enst", "d", "csq", "e", "f", "g", "h", "i",
-        "j", "k", "l", "m", "n"])
-
-    df = pd.read_csv(
-        "../outputs/unaff_parents_coding_snvs_vep_out.tsv",
-        sep="\t",
-        comment="#",
-        header=None,
-        names=names,
-        usecols=["variant", "csq"]
-        )
-
-    # Reformat the data
-    var = df.variant.str.split("_", expand=True)
-
-    chrom = var[0].rename("chrom")
-    pos = var[1].astype(int).rename("pos")
-    ref = var[2].str.split("/").str[0].rename("ref")
-    alt = var[2].str.split("/").str[1].rename("alt")
-
     # Keep only SNVs with the following selected consequences
     consequences = ['synonymous_variant', 'missense_variant', 'stop_gained']
-    csq = df.csq.str.split(",").explode().rename("csq")
-    csq = csq[csq.isin(consequences)]
-
-    df = pd.concat([chrom, pos, ref, alt, csq], axis=1, join="inner")\
-        .drop_duplicates() # 3,039,395 variants (78 duplicated variants)
+    read = {"vep": vc.read, "gencode": cc.read}[source]
+    df = read(df, consequences)\
+        .drop_duplicates()
 
     return df
 
-def read_near_splice_csqs():
+def read_near_splice_csqs(df):
     """ Get the consequence annotations for each near-splice variant.
+    Variants outside the near-splice positions are dropped.
     """
 
-    df = pd.read_csv("../outputs/near_splice_positions.tsv", sep="\t")
-    df["csq"] = df.region + "_" + df.site.astype(str)
-    df = df[["chrom", "pos", "csq"]]
+    index = pi.load("near_splice")
+    df = index.annotate(df, labels=["region", "site"])
+    df["csq"] = df.region.astype(str) + "_" + df.site.astype(str)
+    df = df.drop(["region", "site"], axis=1)
 
     return df
 
@@ -78,32 +70,21 @@ def read_contexts(region):
     df = pd.read_csv(
         f"../outputs/{region}_contexts.tsv",
         sep="\t",
-        header=None,
-        names=["span","context"]
-        )
-
-    # List comprehensions are faster than string methods here:
-    a = pd.DataFrame([x.split(":") for x in df.span])
-    b = pd.DataFrame([x.split("-") for x in a[1]]).astype(int)
-
-    chrom = a[0].rename("chrom")
-    pos = (b[0] + 2).rename("pos")
-
-    df = pd.concat([chrom, pos, df.context], axis=1)\
+        na_filter=False # e.g. "NaN" is a valid context
+        )\
         .drop_duplicates()\
         .drop_duplicates(subset=["chrom","pos"], keep=False)
 
     return df
 
-def combine_annotations():
+def combine_annotations(csq_source="vep"):
     """ Run the functions above to retrieve the annotations.
     Merge these annotations together.
     """
     cd_snvs = read_allele_counts("coding")
     ns_snvs = read_allele_counts("near_splice")
 
-    cd_csqs = read_coding_csqs()
-    ns_csqs = read_near_splice_csqs()
+    cd_csqs = read_coding_csqs(cd_snvs, csq_source)
 
     cd_ctxt = read_contexts("coding")
     ns_ctxt = read_contexts("near_splice")
@@ -111,7 +92,7 @@ def combine_annotations():
     # Merge the data, to retrieve consequences and context annotations for each
     # allele
     cd = cd_snvs.merge(cd_csqs).merge(cd_ctxt)
-    ns = ns_snvs.merge(ns_csqs).merge(ns_ctxt)
+    ns = read_near_splice_csqs(ns_snvs).merge(ns_ctxt)
 
     # Concatenate the coding and near-splice variants
     df = pd.concat([cd, ns])
@@ -139,11 +120,12 @@ def reduce_annotations(df):
     return df
 
 if __name__ == '__main__':
-    output = "../outputs/unaff_parents_allele_counts.tsv"
+    csq_source = sys.argv[1] if len(sys.argv) > 1 else "vep"
+    output = output_path(csq_source)
 
     if os.path.exists(output):
         df = pd.read_csv(output, sep="\t")
     else:
-        df = combine_annotations()\
+        df = combine_annotations(csq_source)\
             .pipe(reduce_annotations)
         df.to_csv(output, sep="\t", index=False)
@@ -0,0 +1,214 @@
+"""
+This script keeps an on-disk cache of VEP consequences for SNVs, so that only
+variants which have not been annotated before are sent to VEP.
+
+The cache is an SQLite database with one row per variant and consequence term:
+    version  key  csq
+The key packs the chromosome, position, ref and alt of an SNV into one
+integer (see pack_keys). The version is the VEP release, cache release and
+assembly used, so changing any of these starts a new set of annotations.
+Every variant in a VEP output gets at least one consequence term, so a variant
+is cached if it has any row.
+
+The VEP settings below are the only copy: vep_snvs.sh reads them with the
+settings command. Outputs from any other VEP release are not added.
+
+Usage (from near_splice/scripts):
+    python3 vep_cache.py add VEP_OUTPUT...
+        Adds the consequences in VEP tab outputs to the cache.
+    eval "$(python3 vep_cache.py settings)"
+        Sets VEP_VERSION, VEP_CACHE_VERSION and VEP_ASSEMBLY in a shell.
+"""
+
+# Import the relevant modules
+import os
+import re
+import sqlite3
+import sys
+import numpy as np
+import pandas as pd
+import mutability
+
+cache_path = "../outputs/cache/vep.sqlite"
+
+# Used by vep_snvs.sh
+vep_version = "99.1"
+cache_version = 99
+assembly = "GRCh38"
+version = f"{vep_version}_{cache_version}_{assembly}"
+
+chroms = [f"chr{x}" for x in list(range(1, 23)) + ["X", "Y", "M"]]
+chrom_codes = {chrom: i + 1 for i, chrom in enumerate(chroms)}
+bases = np.array(list("ACGT"))
+
+def pack_codes(chrom, pos, ref, alt):
+    """ Pack encoded SNVs into integer keys:
+    ((chrom * 2^28 + pos) * 4 + ref) * 4 + alt
+    Chromosomes are numbered chr1-22, X, Y, M from 1, and bases are encoded as
+    in mutability.py.
+    """
+    chrom, pos, ref, alt = [np.asarray(x, dtype=np.int64) for x in (chrom, pos, ref, alt)]
+
+    return ((chrom * 2**28 + pos) * 4 + ref) * 4 + alt
+
+def pack_keys(chrom, pos, ref, alt):
+    """ Pack SNVs (chrom names, positions, and ref and alt bases) into keys.
+    SNVs on other chromosomes, or with bases other than A, C, G or T, get the
+    key -1, as their codes would carry into the key of another SNV.
+    """
+    chrom = pd.Series(np.asarray(chrom)).map(chrom_codes)
+    ref = mutability.encode(ref, k=1)
+    alt = mutability.encode(alt, k=1)
+
+    valid = chrom.notna().to_numpy() & (ref != mutability.invalid) & (alt != mutability.invalid)
+    keys = pack_codes(chrom.fillna(0).to_numpy(np.int64), pos, ref, alt)
+
+    return np.where(valid, keys, -1)
+
+def unpack_keys(keys):
+    """ Unpack integer keys to a dataframe of chrom, pos, ref and alt.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+
+    return pd.DataFrame({
+        "chrom": np.array(chroms)[keys // 2**32 - 1],
+        "pos": keys // 16 % 2**28,
+        "ref": bases[keys // 4 % 4],
+        "alt": bases[keys % 4],
+        })
+
+def connect(path=cache_path):
+    """ Open the cache, creating it if needed.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS vep "
+        "(version TEXT, key INTEGER, csq TEXT, PRIMARY KEY (version, key, csq)) "
+        "WITHOUT ROWID"
+        )
+
+    return con
+
+def query_keys(con, keys):
+    """ Load the (valid, distinct) keys to look up into the temporary table
+    query, so that lookups join on the cache's primary key rather than read
+    the whole cache. Lookups use CROSS JOIN, which SQLite keeps in the order
+    written, so that the query keys are the outer loop.
+    """
+    keys = np.unique(np.asarray(keys, dtype=np.int64))
+    keys = keys[keys >= 0]
+
+    con.execute("DROP TABLE IF EXISTS temp.query")
+    con.execute("CREATE TEMP TABLE query (key INTEGER PRIMARY KEY)")
+    con.executemany("INSERT INTO query VALUES (?)", ((key,) for key in keys.tolist()))
+
+def cached_keys(con, keys, version=version):
+    """ Get the keys which are in the cache.
+    """
+    query_keys(con, keys)
+    rows = con.execute(
+        "SELECT DISTINCT query.key FROM query CROSS JOIN vep "
+        "ON vep.version = ? AND vep.key = query.key",
+        (version,)
+        )
+
+    return np.fromiter((key for key, in rows), dtype=np.int64)
+
+def missing(df, path=cache_path, version=version):
+    """ Keep the SNVs (chrom, pos, ref, alt) which are not in the cache.
+    Invalid SNVs (see pack_keys) are dropped, so are never sent to VEP.
+    """
+    query = pack_keys(df.chrom, df.pos, df.ref, df.alt)
+    valid = query >= 0
+    if not valid.all():
+        print(f"Dropping {(~valid).sum()} SNVs with an unknown chromosome or base")
+
+    with connect(path) as con:
+        keys = cached_keys(con, query, version)
+
+    return df[valid & ~np.isin(query, keys)]
+
+def settings():
+    """ Format the VEP settings as shell variable assignments.
+    """
+    return "\n".join([
+        f"VEP_VERSION={vep_version}",
+        f"VEP_CACHE_VERSION={cache_version}",
+        f"VEP_ASSEMBLY={assembly}",
+        ])
+
+def check_release(path):
+    """ Check that a VEP output was made by the VEP release in vep_version,
+    from its header (e.g. ## ENSEMBL VARIANT EFFECT PREDICTOR v99.1).
+    """
+    with open(path) as f:
+        for line in f:
+            if not line.startswith("##"):
+                break
+
+            match = re.match(r"## ENSEMBL VARIANT EFFECT PREDICTOR v(\S+)", line)
+            if match and match.group(1) != vep_version:
+                raise ValueError(
+                    f"{path} is from VEP {match.group(1)}, not {vep_version} (see vep_cache.py)")
+
+def read_vep_output(path):
+    """ Read a VEP tab output, as one row per variant and consequence term.
+    Variants are named chrom_pos_ref/alt by VEP.
+    """
+    df = pd.read_csv(
+        path,
+        sep="\t",
+        comment="#",
+        header=None,
+        usecols=[0, 6],
+        names=["variant", "csq"]
+        )
+
+    var = df.variant.str.split("_", expand=True)
+    alleles = var[2].str.split("/", expand=True)
+
+    df["key"] = pack_keys(var[0], var[1].astype(int), alleles[0], alleles[1])
+    df = df.loc[df.key >= 0, ["key", "csq"]]\
+        .assign(csq=lambda x: x.csq.str.split(","))\
+        .explode("csq")
+
+    return df
+
+def add(paths, path=cache_path, version=version):
+    """ Add the consequences in VEP tab outputs to the cache.
+    """
+    with connect(path) as con:
+        for vep_output in paths:
+            check_release(vep_output)
+            df = read_vep_output(vep_output)
+            con.executemany(
+                "INSERT OR IGNORE INTO vep VALUES (?, ?, ?)",
+                zip([version] * len(df), df.key.tolist(), df.csq.tolist())
+                )
+
+            print(f"Added {df.key.nunique()} variants from {vep_output}")
+
+def read(df, consequences=None, path=cache_path, version=version):
+    """ Get the cached consequences of SNVs (chrom, pos, ref, alt), as one row
+    per variant and consequence term. Optionally, keep only some terms.
+    """
+    sql = "SELECT vep.key, vep.csq FROM query CROSS JOIN vep "\
+        "ON vep.version = ? AND vep.key = query.key"
+    params = [version]
+    if consequences is not None:
+        sql += f" WHERE vep.csq IN ({','.join('?' * len(consequences))})"
+        params += list(consequences)
+
+    with connect(path) as con:
+        query_keys(con, pack_keys(df.chrom, df.pos, df.ref, df.alt))
+        csqs = pd.DataFrame(con.execute(sql, params).fetchall(), columns=["key", "csq"])
+
+    return pd.concat([unpack_keys(csqs.key), csqs.csq], axis=1)
+
+if __name__ == "__main__":
+    if sys.argv[1] == "add":
+        add(sys.argv[2:])
+    elif sys.argv[1] == "settings":
+        print(settings())
@@ -1,18 +1,18 @@
 """
 This script reformats the unaffected parental coding SNVs to VCF in order to
-run VEP
+run VEP. Only SNVs which are not already in the VEP cache (see vep_cache.py)
+are written, split into up to 22 inputs.
 """
 
 import numpy as np
 import pandas as pd
+import allele_counts as ac
+import vep_cache as vc
 
-df = pd.read_csv(
-    "../outputs/unaff_parents_coding_snvs.tsv",
-    sep="\t",
-    header=None,
-    names=["chrom","pos","ref","alt","filter","an","ac","sample"],
-    usecols=["chrom","pos","ref","alt"]
-    )
+df = ac.read("../outputs/unaff_parents_coding_snvs")[["chrom","pos","ref","alt"]]\
+    .drop_duplicates()
+df = vc.missing(df)
+print(f"{len(df)} coding SNVs to annotate with VEP")
 
 # convert to .vcf format
 df["id"] = "."
@@ -23,7 +23,8 @@ df["info"] = "."
 df = df[["chrom","pos","id","ref","alt","qual","filter","info"]]\
     .sort_values(by=["chrom","pos"])
 
-for i, frame in enumerate(np.array_split(df, 22)):
+n_inputs = min(22, len(df)) # No inputs if every SNV is cached
+for i, frame in enumerate(np.array_split(df, n_inputs) if n_inputs else []):
     frame.to_csv(
         f"../outputs/vep/in/coding_vep_input_{i+1}.vcf",
         sep="\t",
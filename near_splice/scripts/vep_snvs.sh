@@ -10,18 +10,21 @@
 
 # This script annotates all the coding SNVs in the unaffected parents with VEP.
 
-module load bio/VEP/99.1-foss-2019a-Perl-5.28.1
+# The VEP release, cache release and assembly are set in vep_cache.py
+eval "$(python3 vep_cache.py settings)"
+
+module load bio/VEP/${VEP_VERSION}-foss-2019a-Perl-5.28.1
 
 vep \
   --input_file ../outputs/vep/in/coding_vep_input_${LSB_JOBINDEX}.vcf \
   --output_file ../outputs/vep/out/coding_vep_output_${LSB_JOBINDEX}.tsv \
   --tab \
   --species homo_sapiens \
-  --assembly GRCh38 \
+  --assembly ${VEP_ASSEMBLY} \
   --offline \
   --cache \
   --dir_cache ${CACHEDIR} \
-  --cache_version 99 \
+  --cache_version ${VEP_CACHE_VERSION} \
   --fork 4 \
   --buffer_size 100000 \
   --pick \
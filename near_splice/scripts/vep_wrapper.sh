@@ -1,8 +1,14 @@
 #!/usr/bin/env bash
 
-## This script sends the VEP annotation script to an array job on the HPC
-bsub < vep_snvs.sh
-bwait -w 'ended(vep_snvs)'
+## This script sends the VEP annotation script to an array job on the HPC, and
+## waits for it to complete. Run with SCHEDULER=local to run it on this machine
+## instead (see scheduler.py).
+## Only SNVs missing from the VEP cache are annotated (see vep_input_format.py),
+## so there may be fewer than 22 inputs, or none.
+n_inputs=`ls ../outputs/vep/in | wc -l`
+if [ ${n_inputs} -gt 0 ]; then
+  python3 scheduler.py vep_snvs.sh 1-${n_inputs}
 
-# Concatenate the VEP output:
-cat ../outputs/vep/out/* > ../outputs/unaff_parents_coding_snvs_vep_out.tsv
+  # Add the VEP output to the cache
+  python3 vep_cache.py add ../outputs/vep/out/*
+fi